@@ -0,0 +1,232 @@
+"""
+Benchmark suite for Slidescovery.
+
+Generates a reproducible synthetic corpus of PNGs (with A1111-style tEXt and
+ComfyUI-style iTXt metadata) and times the hot paths of SlideshowWidget on an
+offscreen Qt platform. Results are written as JSON so runs on different
+commits can be compared:
+
+    python benchmark.py --count 2000 --output before.json
+    git checkout other-branch
+    python benchmark.py --count 2000 --baseline before.json
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import sys
+import json
+import time
+import zlib
+import struct
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QStandardPaths
+from PIL import Image
+
+import slidescovery
+
+WORDS = ("masterpiece best quality 1girl solo long hair looking at viewer smile blue eyes landscape sunset "
+         "city night rain cyberpunk portrait detailed background forest river mountain sky clouds").split()
+NEEDLE = "needle_token"
+
+# --- Corpus generation ---
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+def make_prompt(rng, size):
+    words = []
+    while sum(len(w) + 2 for w in words) < size: words.append(rng.choice(WORDS))
+    return ", ".join(words)
+
+def write_png(path, width, height, payload_size, rng, needle=False, created=None):
+    # 8-bit RGB with a quarter of each row random, so IDAT compresses roughly like a real render
+    noise = width * 3 // 4
+    raw = b"".join(b"\x00" + rng.randbytes(noise) + bytes(width * 3 - noise) for _ in range(height))
+    prompt = make_prompt(rng, payload_size) + (f", {NEEDLE}" if needle else "")
+    parameters = (f"{prompt}\nNegative prompt: lowres, bad anatomy\n"
+                  f"Steps: 28, Sampler: DPM++ 2M Karras, CFG scale: 7, Seed: {rng.randrange(2**32)}, Size: {width}x{height}, Model: synthetic_v1")
+    workflow = json.dumps({"3": {"class_type": "KSampler", "inputs": {"seed": rng.randrange(2**32), "steps": 28, "cfg": 7.0}},
+                           "6": {"class_type": "CLIPTextEncode", "inputs": {"text": prompt}}})
+    chunks = [png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)),
+              png_chunk(b"tEXt", b"parameters\x00" + parameters.encode("latin-1", "replace")),
+              png_chunk(b"iTXt", b"prompt\x00\x00\x00\x00\x00" + workflow.encode("utf-8"))]
+    if created: chunks.append(png_chunk(b"tEXt", b"Creation Time\x00" + created.encode("latin-1")))
+    chunks += [png_chunk(b"IDAT", zlib.compress(raw, 6)), png_chunk(b"IEND", b"")]
+    with open(path, "wb") as f: f.write(b"\x89PNG\r\n\x1a\n" + b"".join(chunks))
+
+def generate_corpus(folder, count, width, height, payload_size, seed):
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    for i in range(count):
+        created = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(1_700_000_000 + rng.randrange(10**7)))
+        # Only the last file (in name order) carries the needle, so a forward search from the first has to cover everything
+        write_png(os.path.join(folder, f"img_{i:07d}.png"), width, height, payload_size, rng, needle=(i == count - 1), created=created)
+
+# --- Harness ---
+
+def wait_until(app, condition, timeout=600.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline: raise TimeoutError("benchmark step did not finish")
+        app.processEvents()
+        time.sleep(0.001)
+
+class Benchmarks:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = {}
+
+    def measure(self, name, func, setup=None, repeat=None):
+        runs = []
+        for _ in range(repeat or self.repeat):
+            if setup: setup()
+            start = time.perf_counter()
+            func()
+            runs.append(time.perf_counter() - start)
+        self.results[name] = {"runs": runs, "median": statistics.median(runs), "min": min(runs)}
+        print(f"{name:32s} median {self.results[name]['median'] * 1000:10.2f} ms", file=sys.stderr)
+
+    def record(self, name, elapsed):
+        self.results[name] = {"runs": [elapsed], "median": elapsed, "min": elapsed}
+        print(f"{name:32s}        {elapsed * 1000:10.2f} ms", file=sys.stderr)
+
+def git_revision():
+    try: return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError: return None
+
+def run_benchmarks(app, corpus, args):
+    bench = Benchmarks(args.repeat)
+    image_paths = sorted(os.path.join(corpus, name) for name in os.listdir(corpus))
+
+    # Isolated settings folder: nothing here touches the user's real config, metadata cache or thumbnails
+    QStandardPaths.setTestModeEnabled(True)
+    config_path = slidescovery.get_config_path()
+    app_dir = os.path.dirname(config_path)
+    for name in os.listdir(app_dir):
+        target = os.path.join(app_dir, name)
+        if os.path.isdir(target): shutil.rmtree(target)
+        else: os.remove(target)
+    with open(config_path, "w") as f: json.dump({"source": corpus, "sort_order": "alpha", "sort_direction": "asc"}, f)
+
+    def read_with_pillow(path):
+        with Image.open(path) as img: return dict(img.info)
+    bench.measure("metadata_read_pillow", lambda: [read_with_pillow(p) for p in image_paths], repeat=1)
+    bench.measure("metadata_read_chunks", lambda: [slidescovery.read_png_info(p) for p in image_paths], repeat=1)
+
+    start = time.perf_counter()
+    widget = slidescovery.SlideshowWidget()
+    widget.resize(1200, 700)
+    widget.show()
+    wait_until(app, lambda: widget.current_pixmap is not None)
+    bench.record("startup_to_first_image", time.perf_counter() - start)
+    wait_until(app, lambda: not widget.is_loading_folder)
+    bench.record("startup_to_listing", time.perf_counter() - start)
+    wait_until(app, widget.is_index_ready)
+    bench.record("startup_to_index_ready", time.perf_counter() - start)
+
+    def load_folder():
+        widget.load_images(corpus)
+        wait_until(app, lambda: not widget.is_loading_folder)
+    bench.measure("load_images", load_folder)
+    wait_until(app, widget.is_index_ready)
+
+    for order in slidescovery.SORT_ORDERS:
+        widget.current_sort_order = order
+        bench.measure(f"apply_sorting[{order}]", widget.apply_sorting)
+    widget.current_sort_order = "alpha"
+    widget.apply_sorting()
+
+    bench.measure("get_png_info_text_cached", lambda: [widget.get_png_info_text(p) for p in image_paths])
+    bench.measure("metadata_search_fts", lambda: widget.metadata_store.search(slidescovery.SearchQuery.parse(NEEDLE)))
+
+    def scan_for_needle():
+        task = slidescovery.MatchScanTask(slidescovery.MatchScanSignals(), widget.metadata_store, 0, list(widget.image_files),
+                                          0, 1, slidescovery.SearchQuery.parse(NEEDLE), slidescovery.threading.Event())
+        task.run() # Synchronously, on this thread; the task fans out internally
+    bench.measure("find_match_scan_full", scan_for_needle)
+
+    widget.schedule_prefetch = lambda: None # Time only the synchronous path, not background prefetch
+    widget.info_search_bar.setText(NEEDLE)
+    widget.refresh_matches()
+    widget.skip_non_matching = True
+    def jump_to_needle():
+        widget.current_index = 0
+        widget.show_next_image(manual=True)
+    bench.measure("find_match_indexed_jump", jump_to_needle, setup=widget.image_cache.clear)
+    widget.skip_non_matching = False
+    widget.info_search_bar.setText("")
+
+    samples = image_paths[:args.decode_samples]
+    def display_samples():
+        for index in range(len(samples)):
+            widget.current_index = index
+            widget.display_current_image()
+    bench.measure("display_current_image_cold", display_samples, setup=widget.image_cache.clear)
+    bench.measure("display_current_image_cached", display_samples)
+    def rescale_samples():
+        for _ in range(len(samples)):
+            widget.image_cache.clear() # Drop the scaled entry so every call pays for the smooth scale
+            widget.update_image_display()
+    widget.current_index = 0
+    widget.display_current_image()
+    bench.measure("update_image_display", rescale_samples)
+
+    widget.close() # Writes the startup snapshot
+    start = time.perf_counter()
+    restarted = slidescovery.SlideshowWidget() # Paints the first frame from the snapshot inside __init__
+    bench.record("startup_from_snapshot", time.perf_counter() - start)
+    wait_until(app, lambda: not restarted.is_loading_folder)
+    bench.record("startup_snapshot_revalidated", time.perf_counter() - start)
+    restarted.close()
+    return bench.results
+
+def print_comparison(results, baseline_file):
+    with open(baseline_file) as f: baseline = json.load(f)["results"]
+    for name, result in results.items():
+        if name not in baseline: continue
+        ratio = baseline[name]["median"] / result["median"] if result["median"] else float("inf")
+        print(f"{name:32s} {baseline[name]['median'] * 1000:10.2f} ms -> {result['median'] * 1000:10.2f} ms  ({ratio:5.2f}x)", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Time Slidescovery's hot paths on a synthetic PNG corpus.")
+    parser.add_argument("--count", type=int, default=500, help="Number of images in the corpus")
+    parser.add_argument("--width", type=int, default=1024)
+    parser.add_argument("--height", type=int, default=1024)
+    parser.add_argument("--payload", type=int, default=2000, help="Approximate prompt size in bytes per metadata chunk")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--decode-samples", type=int, default=20, help="Images used by the decode/scale benchmarks")
+    parser.add_argument("--corpus", help="Corpus folder to (re)use; generated if empty or missing. Default: a temporary folder")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    parser.add_argument("--baseline", help="Earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    corpus = args.corpus or tempfile.mkdtemp(prefix="slidescovery-bench-")
+    if not os.path.isdir(corpus) or not os.listdir(corpus):
+        print(f"Generating {args.count} images in {corpus}...", file=sys.stderr)
+        generate_corpus(corpus, args.count, args.width, args.height, args.payload, args.seed)
+
+    app = QApplication(sys.argv[:1])
+    results = run_benchmarks(app, os.path.normpath(corpus), args)
+    report = {
+        "revision": git_revision(), "python": platform.python_version(), "platform": platform.platform(),
+        "params": {k: getattr(args, k) for k in ("count", "width", "height", "payload", "seed", "repeat", "decode_samples")},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f: json.dump(report, f, indent=4)
+    else:
+        json.dump(report, sys.stdout, indent=4)
+    if args.baseline: print_comparison(results, args.baseline)
+    if not args.corpus: shutil.rmtree(corpus, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
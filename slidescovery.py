@@ -1,19 +1,43 @@
+from __future__ import annotations # Event annotations stay unevaluated, so the headless command line needs no QtGui
 import sys
 import os
 import random
 import shutil
 import json
 import re
-import send2trash
 import subprocess
-from PyQt6.QtWidgets import (QApplication, QWidget, QLabel, QVBoxLayout, 
-                             QFileDialog, QSizeGrip, QPushButton, QHBoxLayout, QMenu, 
-                             QTextEdit, QSplitter, QRadioButton, QButtonGroup, 
-                             QTreeView, QMessageBox, QInputDialog, QLineEdit, QAbstractItemView)
-from PyQt6.QtCore import QTimer, Qt, QPoint, QSize, QDir, QStandardPaths
-from PyQt6.QtGui import (QPixmap, QMouseEvent, QResizeEvent, QKeyEvent, QAction, 
-                         QFileSystemModel, QWheelEvent, QTextCursor, QTextCharFormat, QColor, QTextDocument, QIcon)
-from PIL import Image # Pillow library
+import sqlite3
+import threading
+import time
+import hashlib
+import struct
+import zlib
+import math
+import errno
+import email.utils
+from datetime import datetime
+import argparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from bisect import bisect_left, bisect_right, insort
+from array import array
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+STARTUP_START = time.perf_counter() # Origin of the --profile-startup phases; the Qt imports below are the first one
+CLI_COMMANDS = ('scan', 'search', 'export')
+HEADLESS = __name__ == '__main__' and len(sys.argv) > 1 and sys.argv[1] in CLI_COMMANDS
+from PyQt6.QtCore import (QTimer, Qt, QPoint, QSize, QDir, QStandardPaths, QCoreApplication,
+                          QObject, QRunnable, QThreadPool, QFileSystemWatcher, pyqtSignal,
+                          QAbstractListModel, QModelIndex, QEvent)
+if HEADLESS:
+    # The command line only needs QtCore; stand-ins let the (unused) widget classes below be defined without QtGui
+    QWidget = QLabel = QImage = object
+else:
+    from PyQt6.QtWidgets import (QApplication, QWidget, QLabel, QVBoxLayout, 
+                                 QFileDialog, QSizeGrip, QPushButton, QHBoxLayout, QMenu, 
+                                 QTextEdit, QSplitter, QRadioButton, QButtonGroup, 
+                                 QTreeView, QMessageBox, QInputDialog, QLineEdit, QAbstractItemView, QListView)
+    from PyQt6.QtGui import (QPixmap, QImage, QImageReader, QMouseEvent, QResizeEvent, QKeyEvent, QAction, QActionGroup, 
+                             QFileSystemModel, QWheelEvent, QTextCursor, QTextCharFormat, QColor, QTextDocument, QIcon, QMovie)
 
 class ImageLabel(QLabel):
     """
@@ -105,46 +129,2068 @@ class TitleBar(QWidget):
         if event.button() == Qt.MouseButton.LeftButton:
             self.parent_widget.toggle_maximize_restore()
 
-class SlideshowWidget(QWidget):
+VALID_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+SORT_ORDERS = ('random', 'time', 'modified', 'size', 'embedded', 'model', 'seed', 'alpha')
+INFO_SORT_ORDERS = ('embedded', 'model', 'seed') # Orders that need each file's metadata
+GENERATION_FIELDS = ('prompt', 'negative', 'seed', 'steps', 'sampler', 'cfg', 'model', 'width', 'height')
+THUMBNAIL_SIZE = 160
+THUMBNAIL_CACHE_BYTES = 1024 * 1024 * 1024 # Cap on the on-disk thumbnail cache; the least recently used are pruned past it
+
+def file_mtime(path):
+    try: return os.stat(path).st_mtime
+    except OSError: return None
+
+def get_config_path():
+    path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+    app_dir = os.path.join(path, "Slidescovery")
+    if not os.path.exists(app_dir):
+        os.makedirs(app_dir)
+    return os.path.join(app_dir, "slideshow_config.json")
+
+def iter_image_files(folder_path, recursive=False, directories=None):
+    """
+    Yields (image path, stat_sort_record) for every image in folder_path, using os.scandir.
+
+    With recursive, subfolders are walked too (symlinks are not followed) and
+    unreadable ones are skipped; an unreadable folder_path itself raises OSError.
+    Each directory that was listed is appended to directories, if given.
+    """
+    folder_path = os.path.normpath(folder_path)
+    pending = [folder_path]
+    while pending:
+        directory = pending.pop()
+        try: entries = os.scandir(directory)
+        except OSError:
+            if directory == folder_path: raise
+            continue # Unreadable subfolder; skip it
+        with entries:
+            for entry in entries:
+                try:
+                    if recursive and entry.is_dir(follow_symlinks=False):
+                        pending.append(os.path.join(directory, entry.name))
+                        continue
+                    if os.path.splitext(entry.name)[1].lower() not in VALID_EXTENSIONS or not entry.is_file(): continue
+                    record = stat_sort_record(entry.stat())
+                except OSError: continue # Vanished while listing
+                yield os.path.join(directory, entry.name), record
+        if directories is not None: directories.append(directory)
+
+def info_sort_values(info):
+    # (embedded timestamp, model, seed) of PNG info: what the info sort orders compare
+    params = parse_generation_params(info)
+    return (parse_embedded_timestamp(info), params.get('model'), params.get('seed'))
+
+def count_models(paths, sort_values):
+    # [(model, number of files)] over paths, from MetadataStore.sort_values; most used first
+    counts = Counter(stored[2] for stored in map(sort_values.get, paths) if stored and stored[2] is not None)
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+
+def make_sort_key(sort_order, get_sort_values=None):
+    # Key function key(path, stat_sort_record) for a non-random sort order; get_sort_values(path, record) ->
+    # info_sort_values of the file, or None when unknown
+    get_sort_values = get_sort_values or (lambda path, record: None)
+    if sort_order == "time": return lambda path, record: record[0]
+    if sort_order == "modified": return lambda path, record: record[1]
+    if sort_order == "size": return lambda path, record: record[2]
+    if sort_order == "embedded": # Files without one sort by their creation time
+        def embedded_key(path, record):
+            timestamp = (get_sort_values(path, record) or (None,))[0]
+            return timestamp if timestamp is not None else record[0]
+        return embedded_key
+    if sort_order == "model": # Files without a model go last, then grouped by model
+        def model_key(path, record):
+            model = (get_sort_values(path, record) or (None, None))[1]
+            return (model is None, (model or "").lower(), os.path.basename(path).lower())
+        return model_key
+    if sort_order == "seed":
+        def seed_key(path, record):
+            seed = (get_sort_values(path, record) or (None, None, None))[2]
+            return (seed is None, seed or 0)
+        return seed_key
+    return lambda path, record: os.path.basename(path).lower()
+
+def list_directory(directory):
+    # Returns ([(image path, stat_sort_record)], [subdirectory paths]) for one directory level
+    images, subdirectories = [], []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(os.path.join(directory, entry.name))
+                elif os.path.splitext(entry.name)[1].lower() in VALID_EXTENSIONS and entry.is_file():
+                    images.append((os.path.join(directory, entry.name), stat_sort_record(entry.stat())))
+            except OSError: continue # Vanished while listing
+    return images, subdirectories
+
+def decode_image(image_path, target_size=None):
+    # Decodes image_path; with a target QSize, larger images are decoded straight at (about) that size,
+    # which lets e.g. the JPEG reader skip most of the work instead of decoding full resolution first
+    reader = QImageReader(image_path)
+    if target_size is not None and not target_size.isEmpty():
+        source_size = reader.size()
+        if source_size.isValid() and fit_decode_size(source_size, target_size) != source_size:
+            reader.setScaledSize(fit_decode_size(source_size, target_size))
+    return reader.read()
+
+def fit_decode_size(source_size, target_size):
+    # Size an image of source_size is decoded at for display in target_size (None: full resolution); never upscales
+    if target_size is None or target_size.isEmpty(): return source_size
+    if source_size.width() <= target_size.width() and source_size.height() <= target_size.height(): return source_size
+    return source_size.scaled(target_size, Qt.AspectRatioMode.KeepAspectRatio)
+
+def decode_cache_tag(target_size):
+    # The ImageCache size slot for a decode: None for full resolution, ('decoded', w, h) for a reduced one
+    if target_size is None: return None
+    return ('decoded', target_size.width(), target_size.height())
+
+def stat_sort_record(stat):
+    # (created, modified, size); st_birthtime where the platform has it, else ctime (creation time on Windows)
+    return (getattr(stat, 'st_birthtime', stat.st_ctime), stat.st_mtime, stat.st_size)
+
+class FileTable:
+    """
+    Compact ordered list of image paths with their stat_sort_record.
+
+    Each row is a (directory id, basename id) pair in typed arrays, with every
+    directory and basename string stored once, and the stat fields packed in
+    parallel columns. Paths are assembled on access. Supports the list
+    operations the widget uses (len, [i], iteration, index, `in`, append,
+    extend, insert, pop, sort, reverse).
+
+    pop() only marks its row dead, and an insert() is remembered next to the
+    path -> row map instead of shifting it, so neither touches the other rows;
+    a list index is translated with a bisect over those few changes. Once
+    COMPACT_AFTER of them pile up the dead rows are dropped and the map is
+    rebuilt on the next lookup.
+    """
+    COLUMNS = ('dir_column', 'name_column', 'created', 'modified', 'sizes')
+    COMPACT_AFTER = 512
+
+    def __init__(self):
+        self.directories, self.directory_ids = [], {}
+        self.names, self.name_ids = [], {}
+        self.dir_column, self.name_column = array('L'), array('L')
+        self.created, self.modified, self.sizes = array('d'), array('d'), array('q')
+        self.positions = None # (dir id << 32 | name id) -> row, as of the last build
+        self.dead, self.dead_offsets = [], [] # Sorted rows popped since the last compaction; row - its rank
+        self.inserted, self.inserted_offsets, self.inserted_keys = [], [], {} # Same for rows inserted since the build; key -> row
+
+    def copy(self):
+        # Independent row order without the dead rows; the string tables are append-only, so they are shared
+        table = FileTable.__new__(FileTable)
+        table.__dict__.update(self.__dict__)
+        rows = self._live_rows()
+        for column in self.COLUMNS:
+            values = getattr(self, column)
+            setattr(table, column, array(values.typecode, values if rows is None else (values[row] for row in rows)))
+        table.positions, table.dead, table.dead_offsets = None, [], []
+        table.inserted, table.inserted_offsets, table.inserted_keys = [], [], {}
+        return table
+
+    def intern_name(self, name):
+        name_id = self.name_ids.get(name)
+        if name_id is None:
+            name_id = self.name_ids[name] = len(self.names)
+            self.names.append(name)
+        return self.names[name_id]
+
+    def _ids(self, path, create=False):
+        directory, name = os.path.split(path)
+        dir_id, name_id = self.directory_ids.get(directory), self.name_ids.get(name)
+        if not create: return None if dir_id is None or name_id is None else (dir_id, name_id)
+        if dir_id is None:
+            dir_id = self.directory_ids[directory] = len(self.directories)
+            self.directories.append(directory)
+        if name_id is None:
+            self.intern_name(name)
+            name_id = self.name_ids[name]
+        return dir_id, name_id
+
+    def _row(self, index):
+        # Physical row of list index; index == len(self) gives the end of the columns
+        size = len(self)
+        if index < 0: index += size
+        if not 0 <= index <= size: raise IndexError("file table index out of range")
+        return index + bisect_right(self.dead_offsets, index) if self.dead else index
+
+    def _live_rows(self):
+        # Physical rows still in the list, or None when none are dead
+        if not self.dead: return None
+        dead = set(self.dead)
+        return [row for row in range(len(self.dir_column)) if row not in dead]
+
+    def __len__(self):
+        return len(self.dir_column) - len(self.dead)
+
+    def __getitem__(self, index):
+        row = self._row(index)
+        if row == len(self.dir_column): raise IndexError("file table index out of range")
+        return os.path.join(self.directories[self.dir_column[row]], self.names[self.name_column[row]])
+
+    def __iter__(self):
+        directories, names, dead = self.directories, self.names, set(self.dead)
+        for row, (dir_id, name_id) in enumerate(zip(self.dir_column, self.name_column)):
+            if row not in dead: yield os.path.join(directories[dir_id], names[name_id])
+
+    def record(self, index):
+        row = self._row(index)
+        return (self.created[row], self.modified[row], self.sizes[row])
+
+    def records(self):
+        # (path, stat_sort_record) for every row, in order
+        rows = self._live_rows()
+        for row in range(len(self.dir_column)) if rows is None else rows:
+            yield (os.path.join(self.directories[self.dir_column[row]], self.names[self.name_column[row]]),
+                   (self.created[row], self.modified[row], self.sizes[row]))
+
+    def position(self, path, default=None):
+        ids = self._ids(path)
+        if ids is None: return default
+        key = ids[0] << 32 | ids[1]
+        if self.positions is None:
+            self.compact()
+            self.positions = {dir_id << 32 | name_id: row for row, (dir_id, name_id) in enumerate(zip(self.dir_column, self.name_column))}
+        row = self.inserted_keys.get(key)
+        if row is None:
+            row = self.positions.get(key)
+            if row is None: return default
+            row += bisect_right(self.inserted_offsets, row) # Rows inserted in front of it since the build
+        dead_rank = bisect_left(self.dead, row)
+        if dead_rank < len(self.dead) and self.dead[dead_rank] == row: return default
+        return row - dead_rank
+
+    def __contains__(self, path):
+        return self.position(path) is not None
+
+    def index(self, path):
+        row = self.position(path)
+        if row is None: raise ValueError(f"{path!r} is not in the file table")
+        return row
+
+    def insert(self, index, path, record=(0, 0, 0)):
+        dir_id, name_id = self._ids(path, create=True)
+        row = self._row(min(max(index, -len(self)), len(self)))
+        for column, value in zip(self.COLUMNS, (dir_id, name_id) + tuple(record)): getattr(self, column).insert(row, value)
+        if self.dead: self._set_dead([dead + (dead >= row) for dead in self.dead])
+        if self.positions is not None:
+            inserted = [other + (other >= row) for other in self.inserted]
+            insort(inserted, row)
+            self.inserted, self.inserted_offsets = inserted, [other - rank for rank, other in enumerate(inserted)]
+            self.inserted_keys = {key: other + (other >= row) for key, other in self.inserted_keys.items()}
+            self.inserted_keys[dir_id << 32 | name_id] = row
+            if len(self.inserted) > self.COMPACT_AFTER: self.positions = None
+
+    def append(self, path, record=(0, 0, 0)):
+        self.insert(len(self), path, record)
+
+    def extend(self, entries):
+        # entries: (path, stat_sort_record) pairs
+        for path, (created, modified, size) in entries:
+            dir_id, name_id = self._ids(path, create=True)
+            self.dir_column.append(dir_id)
+            self.name_column.append(name_id)
+            self.created.append(created)
+            self.modified.append(modified)
+            self.sizes.append(size)
+        self.positions = None
+
+    def pop(self, index=-1):
+        path = self[index]
+        row = self._row(index)
+        dead = list(self.dead)
+        insort(dead, row)
+        self._set_dead(dead)
+        self.inserted_keys.pop(self.dir_column[row] << 32 | self.name_column[row], None)
+        if len(dead) > self.COMPACT_AFTER: self.compact()
+        return path
+
+    def _set_dead(self, dead):
+        self.dead, self.dead_offsets = dead, [row - rank for rank, row in enumerate(dead)]
+
+    def compact(self):
+        # Drops the dead rows; the path -> row map is rebuilt on the next lookup
+        rows = self._live_rows()
+        if rows is not None:
+            for name in self.COLUMNS:
+                column = getattr(self, name)
+                setattr(self, name, array(column.typecode, [column[row] for row in rows]))
+            self.positions = None
+        self._set_dead([])
+        if self.positions is None: self.inserted, self.inserted_offsets, self.inserted_keys = [], [], {}
+
+    def reverse(self):
+        self.compact()
+        for column in self.COLUMNS: getattr(self, column).reverse()
+        self.positions = None
+
+    def sort(self, key=None, reverse=False):
+        # key(path, stat_sort_record); without one, by path
+        self.compact()
+        keys = list(self) if key is None else [key(path, record) for path, record in self.records()]
+        order = sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse)
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, [column[i] for i in order]))
+        self.positions = None
+        self.inserted, self.inserted_offsets, self.inserted_keys = [], [], {}
+
+    def directory_names(self):
+        # directory -> set of the (interned) basenames listed from it
+        directories, names, result, dead = self.directories, self.names, {}, set(self.dead)
+        for row, (dir_id, name_id) in enumerate(zip(self.dir_column, self.name_column)):
+            if row not in dead: result.setdefault(directories[dir_id], set()).add(names[name_id])
+        return result
+
+    def to_bytes(self):
+        # A JSON header line with the string tables, then every column's raw array
+        self.compact()
+        header = {'rows': len(self), 'directories': self.directories, 'names': self.names,
+                  'columns': [(getattr(self, column).typecode, getattr(self, column).itemsize) for column in self.COLUMNS]}
+        return json.dumps(header, ensure_ascii=False).encode('utf-8') + b'\n' + b''.join(getattr(self, column).tobytes() for column in self.COLUMNS)
+
+    @classmethod
+    def from_bytes(cls, data):
+        # Inverse of to_bytes; ValueError for data that is damaged or was written on a platform with other array sizes
+        header_end = data.index(b'\n')
+        header = json.loads(data[:header_end])
+        table, rows, offset = cls(), header['rows'], header_end + 1
+        table.directories, table.names = header['directories'], header['names']
+        table.directory_ids = {directory: i for i, directory in enumerate(table.directories)}
+        table.name_ids = {name: i for i, name in enumerate(table.names)}
+        for column, (typecode, itemsize) in zip(cls.COLUMNS, header['columns']):
+            values = array(typecode)
+            if values.itemsize != itemsize or len(data) < offset + rows * itemsize: raise ValueError("file table does not match its header")
+            values.frombytes(data[offset:offset + rows * itemsize])
+            offset += rows * itemsize
+            setattr(table, column, values)
+        if rows and (max(table.dir_column) >= len(table.directories) or max(table.name_column) >= len(table.names)):
+            raise ValueError("file table refers to missing strings")
+        return table
+
+def parse_embedded_timestamp(info):
+    # Creation timestamp written into the image metadata, as a POSIX time (None if absent or unparseable)
+    for key, value in info:
+        if key.lower() not in ('creation time', 'date:create', 'datetimeoriginal'): continue
+        value = value.strip()
+        try: return email.utils.parsedate_to_datetime(value).timestamp() # PNG spec: RFC 1123
+        except (TypeError, ValueError): pass
+        for parse in (datetime.fromisoformat, lambda v: datetime.strptime(v, '%Y:%m:%d %H:%M:%S')):
+            try: return parse(value).timestamp()
+            except ValueError: pass
+    return None
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_TEXT_CHUNKS = (b'tEXt', b'zTXt', b'iTXt')
+MAX_TEXT_CHUNK = 64 * 1024 * 1024 # Bound on a single (decompressed) text chunk; large ComfyUI workflows stay well below
+
+def inflate_text(data):
+    decompressor = zlib.decompressobj()
+    text = decompressor.decompress(data, MAX_TEXT_CHUNK)
+    if decompressor.unconsumed_tail: raise ValueError("text chunk too large")
+    return text
+
+def decode_png_text_chunk(kind, data):
+    # (key, value) of a tEXt / zTXt / iTXt chunk; raises ValueError or zlib.error on malformed data
+    key, _, rest = data.partition(b'\0')
+    key = key.decode('latin-1')
+    if kind == b'tEXt': return key, rest.decode('latin-1')
+    if kind == b'zTXt': return key, inflate_text(rest[1:]).decode('latin-1') # rest[0] is the compression method
+    if len(rest) < 2: raise ValueError("truncated iTXt chunk")
+    compressed, rest = rest[0], rest[2:] # Compression flag and method, then language tag and translated keyword
+    _language, _, rest = rest.partition(b'\0')
+    _translated, _, text = rest.partition(b'\0')
+    return key, (inflate_text(text) if compressed else text).decode('utf-8', 'replace')
+
+def read_png_text_chunks(image_path):
+    """
+    Reads the text chunks of a PNG by walking chunk headers and seeking past
+    everything else (IDAT in particular), so trailing text after the image
+    data costs a few seeks instead of a full read. Returns a {key: value}
+    dict in file order (a repeated key keeps its last value, as Pillow does),
+    or None if the file isn't a PNG.
+    """
+    info = {}
+    with open(image_path, 'rb', buffering=0) as f: # Unbuffered: a header read must not pull in the data being skipped
+        if f.read(8) != PNG_SIGNATURE: return None
+        while True:
+            header = f.read(8)
+            if len(header) < 8: break
+            length, kind = struct.unpack('>I4s', header)
+            if kind == b'IEND': break
+            if kind in PNG_TEXT_CHUNKS and length <= MAX_TEXT_CHUNK:
+                data = f.read(length)
+                if len(data) < length: break
+                try:
+                    key, value = decode_png_text_chunk(kind, data)
+                    info[key] = value
+                except (ValueError, zlib.error): pass # Skip a corrupt chunk, keep the rest
+                f.seek(4, os.SEEK_CUR) # CRC
+            else:
+                f.seek(length + 4, os.SEEK_CUR)
+    return info
+
+def read_png_info(image_path):
+    # Returns the PNG text metadata as a list of [key, value] pairs (empty for other formats)
+    if not image_path.lower().endswith('.png'): return []
+    try:
+        info = read_png_text_chunks(image_path)
+        if info is None: # Not really a PNG (e.g. a renamed JPEG); let Pillow make sense of it
+            from PIL import Image # Pillow library; imported on first use since only such files need it
+            with Image.open(image_path) as img: info = img.info
+        return [[str(key), str(value)] for key, value in info.items()]
+    except Exception:
+        return []
+
+GIF_SIGNATURES = (b'GIF87a', b'GIF89a')
+MIN_FRAME_DELAY = 0.02 # Shorter (or zero) frame delays are shown for 0.1 s, as browsers do
+
+def frame_delay(seconds):
+    return seconds if seconds >= MIN_FRAME_DELAY else 0.1
+
+def read_gif_frame_delays(f):
+    # Per-frame delays (seconds) from a GIF's Graphic Control Extensions; f is just past the signature.
+    # Image data is skipped sub-block by sub-block, never decoded
+    def skip_sub_blocks():
+        while True:
+            size = f.read(1)
+            if not size or size[0] == 0: return
+            f.seek(size[0], os.SEEK_CUR)
+    screen = f.read(7)
+    if len(screen) < 7: return []
+    if screen[4] & 0x80: f.seek(3 << ((screen[4] & 7) + 1), os.SEEK_CUR) # Global color table
+    delays, delay = [], 0
+    while True:
+        introducer = f.read(1)
+        if introducer == b'!':
+            if f.read(1) == b'\xf9': # Graphic Control Extension: size, flags, delay (1/100 s, little-endian), transparency, terminator
+                block = f.read(6)
+                if len(block) < 6: break
+                delay = int.from_bytes(block[2:4], 'little')
+            else: skip_sub_blocks()
+        elif introducer == b',': # Image descriptor, then an optional local color table and the LZW data
+            descriptor = f.read(9)
+            if len(descriptor) < 9: break
+            if descriptor[8] & 0x80: f.seek(3 << ((descriptor[8] & 7) + 1), os.SEEK_CUR)
+            f.seek(1, os.SEEK_CUR) # LZW minimum code size
+            skip_sub_blocks()
+            delays.append(frame_delay(delay / 100))
+            delay = 0
+        else: break # Trailer, end of file or garbage
+    return delays
+
+def read_apng_frame_delays(f):
+    # Per-frame delays (seconds) from an APNG's fcTL chunks; f is just past the signature. A PNG without acTL
+    # before its image data is a still, and the walk stops there
+    delays, animated = [], False
+    while True:
+        header = f.read(8)
+        if len(header) < 8: break
+        length, kind = struct.unpack('>I4s', header)
+        if kind == b'IEND' or (kind == b'IDAT' and not animated): break
+        if kind == b'acTL': animated = True
+        if kind == b'fcTL' and length >= 26: # sequence, width, height, x, y, delay numerator/denominator, dispose, blend
+            data = f.read(26)
+            if len(data) < 26: break
+            numerator, denominator = struct.unpack('>HH', data[20:24])
+            delays.append(frame_delay(numerator / (denominator or 100)))
+            f.seek(length - 26 + 4, os.SEEK_CUR)
+        else:
+            f.seek(length + 4, os.SEEK_CUR)
+    return delays
+
+def read_animation_info(image_path):
+    # ('gif' or 'png', frame delays in seconds) for an animated GIF or APNG, None for a still or another format.
+    # Reads only block and chunk headers, so it is cheap enough to run on every displayed image
+    try:
+        with open(image_path, 'rb') as f:
+            signature = f.read(8)
+            if signature[:6] in GIF_SIGNATURES:
+                f.seek(6)
+                kind, delays = 'gif', read_gif_frame_delays(f)
+            elif signature == PNG_SIGNATURE: kind, delays = 'png', read_apng_frame_delays(f)
+            else: return None
+    except OSError: return None
+    return (kind, delays) if len(delays) > 1 else None
+
+def format_png_info(info):
+    return "\n\n".join(f"{key}:\n{value}" for key, value in info)
+
+A1111_PARAM_RE = re.compile(r'\s*([\w ./-]+):\s*("(?:\\.|[^\\"])+"|[^,]*)(?:,|$)') # `Key: value` pairs of the settings line
+
+def to_int(value):
+    try: return int(str(value).strip())
+    except (TypeError, ValueError): return None
+
+def to_float(value):
+    try: return float(str(value).strip())
+    except (TypeError, ValueError): return None
+
+def parse_a1111_parameters(text):
+    # AUTOMATIC1111 / Forge `parameters`: prompt lines, optional "Negative prompt:" lines, then one settings line
+    lines = text.strip().split("\n")
+    settings = {}
+    if lines and len(A1111_PARAM_RE.findall(lines[-1])) >= 3:
+        for key, value in A1111_PARAM_RE.findall(lines.pop()):
+            if value.startswith('"'): value = value[1:-1].replace('\\"', '"')
+            settings[key.strip()] = value.strip()
+    prompt, negative, in_negative = [], [], False
+    for line in lines:
+        if line.startswith("Negative prompt:"):
+            in_negative = True
+            line = line[len("Negative prompt:"):].strip()
+        (negative if in_negative else prompt).append(line)
+    size = re.fullmatch(r'(\d+)x(\d+)', settings.get('Size', ''))
+    return {
+        'prompt': "\n".join(prompt).strip() or None, 'negative': "\n".join(negative).strip() if in_negative else None,
+        'seed': to_int(settings.get('Seed')), 'steps': to_int(settings.get('Steps')), 'sampler': settings.get('Sampler'),
+        'cfg': to_float(settings.get('CFG scale')), 'model': settings.get('Model') or settings.get('Model hash'),
+        'width': int(size.group(1)) if size else None, 'height': int(size.group(2)) if size else None,
+    }
+
+def parse_comfyui_prompt(text):
+    # ComfyUI `prompt`: the API graph {node id: {class_type, inputs}}, where a linked input is [node id, output index]
+    graph = json.loads(text)
+    if not isinstance(graph, dict): return {}
+    def linked(value):
+        return graph.get(str(value[0])) if isinstance(value, list) and value else None
+    def find_input(node, names):
+        # Nearest literal value for one of names, at node or upstream of it
+        pending, seen = [node], set()
+        while pending:
+            node = pending.pop(0)
+            if not isinstance(node, dict) or id(node) in seen: continue
+            seen.add(id(node))
+            inputs = node.get('inputs') or {}
+            for name in names:
+                if name in inputs and not isinstance(inputs[name], list): return inputs[name]
+            pending.extend(linked(value) for value in inputs.values() if isinstance(value, list))
+        return None
+    sampler = next((node for node in graph.values() if isinstance(node, dict) and isinstance(node.get('inputs'), dict)
+                    and ('seed' in node['inputs'] or 'noise_seed' in node['inputs']) and 'positive' in node['inputs']), None)
+    if sampler is None: return {}
+    inputs = sampler['inputs']
+    latent = linked(inputs.get('latent_image'))
+    return {
+        'prompt': find_input(linked(inputs.get('positive')), ('text', 'text_g')),
+        'negative': find_input(linked(inputs.get('negative')), ('text', 'text_g')),
+        'seed': to_int(find_input(sampler, ('seed', 'noise_seed'))), 'steps': to_int(find_input(sampler, ('steps',))),
+        'sampler': find_input(sampler, ('sampler_name',)), 'cfg': to_float(find_input(sampler, ('cfg',))),
+        'model': find_input(linked(inputs.get('model')), ('ckpt_name', 'unet_name')),
+        'width': to_int(find_input(latent, ('width',))), 'height': to_int(find_input(latent, ('height',))),
+    }
+
+def parse_comfyui_workflow(text):
+    # ComfyUI `workflow` (the editor graph) only has positional widget values; the checkpoint name is the reliable part
+    workflow = json.loads(text)
+    for node in (workflow.get('nodes') or []) if isinstance(workflow, dict) else []:
+        if 'CheckpointLoader' in str(node.get('type', '')) and node.get('widgets_values'):
+            return {'model': str(node['widgets_values'][0])}
+    return {}
+
+def parse_generation_params(info):
+    """
+    Extracts typed generation parameters from PNG text metadata (A1111
+    `parameters`, else ComfyUI `prompt`, else `workflow`). Returns a dict
+    over GENERATION_FIELDS (missing values are None), or {} when nothing
+    recognizable is present.
+    """
+    info = dict(info)
+    for key, parse in (('parameters', parse_a1111_parameters), ('prompt', parse_comfyui_prompt), ('workflow', parse_comfyui_workflow)):
+        if key not in info: continue
+        try: params = parse(info[key])
+        except (ValueError, TypeError, AttributeError): continue # Malformed JSON or an unrelated chunk with the same key
+        if any(value is not None for value in params.values()):
+            params = {field: params.get(field) for field in GENERATION_FIELDS}
+            for field in ('prompt', 'negative', 'sampler', 'model'):
+                if params[field] is not None: params[field] = str(params[field])
+            if params['seed'] is not None and params['seed'] < 0: params['seed'] = None
+            return params
+    return {}
+
+def format_generation_params(params):
+    # Short summary shown above the raw metadata in the info pane
+    if not params: return ""
+    parts = [f"{label}: {params[field]}" for label, field in (("Model", 'model'), ("Seed", 'seed'), ("Steps", 'steps'),
+                                                              ("Sampler", 'sampler'), ("CFG", 'cfg')) if params.get(field) is not None]
+    if params.get('width') and params.get('height'): parts.append(f"Size: {params['width']}x{params['height']}")
+    return "  |  ".join(parts)
+
+def params_match_filter(params, param_filter):
+    # param_filter: {'model': name, 'seed': [low, high]}; absent keys don't constrain
+    if 'model' in param_filter and params.get('model') != param_filter['model']: return False
+    if 'seed' in param_filter:
+        seed = params.get('seed')
+        if seed is None or not param_filter['seed'][0] <= seed <= param_filter['seed'][1]: return False
+    return True
+
+def describe_param_filter(param_filter):
+    parts = []
+    if 'model' in param_filter: parts.append(f"model {param_filter['model']}")
+    if 'seed' in param_filter:
+        low, high = param_filter['seed']
+        parts.append(f"seed {low}" if low == high else f"seed {low}-{high}")
+    return ", ".join(parts)
+
+class QuerySyntaxError(ValueError):
+    def __init__(self, message, position):
+        super().__init__(f"{message} (at column {position + 1})")
+        self.position = position
+
+class SearchQuery:
+    """
+    A compiled info-search query.
+
+    Space-separated terms must all match; `OR` (or `|`) combines terms or
+    groups, `NOT` or a leading `-` negates, and parentheses group. A term is
+    a word, a "quoted phrase" or a /regex/, optionally scoped to a generation
+    parameter: `model:sdxl`, `negative:"bad hands"`, `seed:100..200`,
+    `steps:..30`. Text matching is a case-insensitive substring match.
+
+    Parsed once per query edit; the result is evaluated in Python (matches)
+    or translated to SQL over the MetadataStore tables (to_sql).
+    """
+    TEXT_FIELDS = ('prompt', 'negative', 'sampler', 'model')
+    NUMBER_FIELDS = ('seed', 'steps', 'cfg', 'width', 'height')
+    FIELD_RE = re.compile(r'(\w+):(?=\S)')
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = self._tokenize(text)
+        self.pos = 0
+        self.root = self._parse_or()
+        if self.pos < len(self.tokens): raise QuerySyntaxError("Unmatched ')'", self.tokens[self.pos][2])
+        self.uses_params = self._uses_params(self.root)
+
+    @classmethod
+    def parse(cls, text):
+        # None for a blank query; raises QuerySyntaxError
+        return cls(text) if text.strip() else None
+
+    # --- Parsing ---
+
+    def _tokenize(self, text):
+        tokens, i, n = [], 0, len(text)
+        while i < n:
+            ch = text[i]
+            if ch.isspace(): i += 1; continue
+            if ch in '()|': tokens.append((ch, ch, i)); i += 1; continue
+            if ch == '-' and i + 1 < n and not text[i + 1].isspace(): tokens.append(('NOT', ch, i)); i += 1; continue
+            start, field = i, None
+            match = self.FIELD_RE.match(text, i)
+            if match and match.group(1).lower() in self.TEXT_FIELDS + self.NUMBER_FIELDS:
+                field, i = match.group(1).lower(), match.end()
+            if text[i] == '"':
+                end = text.find('"', i + 1)
+                if end < 0: raise QuerySyntaxError("Unclosed quote", i)
+                tokens.append(('TERM', (field, 'phrase', text[i + 1:end]), start))
+                i = end + 1
+            elif text[i] == '/':
+                end = i + 1
+                while end < n and text[end] != '/': end += 2 if text[end] == '\\' else 1
+                if end >= n: raise QuerySyntaxError("Unclosed regex (missing '/')", i)
+                tokens.append(('TERM', (field, 'regex', text[i + 1:end]), start))
+                i = end + 1
+            else:
+                end = i
+                while end < n and not text[end].isspace() and text[end] not in '"|': end += 1
+                word = text[i:end].rstrip(')') # A trailing ')' closes a group; quote the term for a literal one
+                if field is None and word in ('OR', 'AND', 'NOT'): tokens.append((word if word != 'OR' else '|', word, start))
+                elif word: tokens.append(('TERM', (field, 'word', word), start))
+                tokens += [(')', ')', position) for position in range(i + len(word), end)]
+                i = end
+        return tokens
+
+    def _peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def _position(self):
+        return self.tokens[self.pos][2] if self.pos < len(self.tokens) else len(self.text)
+
+    def _parse_or(self):
+        nodes = [self._parse_and()]
+        while self._peek() == '|':
+            self.pos += 1
+            nodes.append(self._parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def _parse_and(self):
+        nodes = []
+        while self._peek() not in (None, '|', ')'):
+            if self._peek() == 'AND': self.pos += 1; continue
+            nodes.append(self._parse_unary())
+        if not nodes: raise QuerySyntaxError("Expected a search term", self._position())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def _parse_unary(self):
+        kind, value, position = self.tokens[self.pos]
+        self.pos += 1
+        if kind == 'NOT':
+            if self._peek() in (None, '|', ')', 'AND'): raise QuerySyntaxError("Expected a term after NOT", self._position())
+            return ('not', self._parse_unary())
+        if kind == '(':
+            node = self._parse_or()
+            if self._peek() != ')': raise QuerySyntaxError("Unclosed '('", position)
+            self.pos += 1
+            return node
+        return self._make_leaf(*value, position)
+
+    def _make_leaf(self, field, kind, value, position):
+        if field in self.NUMBER_FIELDS:
+            convert = float if field == 'cfg' else int # int keeps 64-bit seeds exact
+            parts = value.split('..')
+            try:
+                if kind != 'word' or len(parts) > 2 or not any(parts): raise ValueError
+                if len(parts) == 1: parts *= 2 # Exact value
+                low, high = [convert(part) if part else None for part in parts]
+            except ValueError:
+                raise QuerySyntaxError(f"{field}: expects a number or a range like 100..200", position)
+            return ('range', field, low, high)
+        if kind == 'regex':
+            try: return ('regex', field, re.compile(value, re.IGNORECASE))
+            except re.error as e: raise QuerySyntaxError(f"Invalid regex: {e.msg}", position + (e.pos or 0))
+        return ('text', field, value.lower())
+
+    def _uses_params(self, node):
+        if node[0] in ('and', 'or'): return any(self._uses_params(child) for child in node[1])
+        if node[0] == 'not': return self._uses_params(node[1])
+        return node[1] is not None
+
+    # --- Evaluation ---
+
+    def matches(self, info_text, params=None):
+        # info_text: format_png_info() of the file; params: its generation parameters (needed when uses_params)
+        return self._eval(self.root, info_text, info_text.lower(), params or {})
+
+    def _eval(self, node, text, lowered, params):
+        kind = node[0]
+        if kind == 'and': return all(self._eval(child, text, lowered, params) for child in node[1])
+        if kind == 'or': return any(self._eval(child, text, lowered, params) for child in node[1])
+        if kind == 'not': return not self._eval(node[1], text, lowered, params)
+        field = node[1]
+        if kind == 'range':
+            value = params.get(field)
+            return value is not None and (node[2] is None or value >= node[2]) and (node[3] is None or value <= node[3])
+        if field is not None:
+            text = params.get(field)
+            if text is None: return False
+            lowered = text.lower()
+        return node[2].search(text) is not None if kind == 'regex' else node[2] in lowered
+
+    def to_sql(self):
+        # (WHERE clause over png_info, arguments); REGEXP is provided by MetadataStore
+        args = []
+        return self._sql(self.root, args), args
+
+    def _sql(self, node, args):
+        kind = node[0]
+        if kind in ('and', 'or'): return "(" + f" {kind.upper()} ".join(self._sql(child, args) for child in node[1]) + ")"
+        if kind == 'not': return f"NOT {self._sql(node[1], args)}"
+        field = node[1]
+        if kind == 'range':
+            clauses = []
+            for operator, bound in ((">=", node[2]), ("<=", node[3])):
+                if bound is None: continue
+                clauses.append(f"{field} {operator} ?")
+                args.append(MetadataStore.seed_key(bound) if field == 'seed' else bound)
+            return f"png_info.path IN (SELECT path FROM generation_params WHERE {' AND '.join(clauses)})"
+        if field is None: column, source, key = "text", "png_text", "rowid"
+        else: column, source, key = field, "generation_params", "path"
+        if kind == 'regex':
+            condition = f"{column} REGEXP ?"
+            args.append(node[2].pattern)
+        elif field is None and len(node[2]) >= 3: # Trigram index lookup; a quoted phrase is a substring match
+            condition = "png_text MATCH ?"
+            args.append('"' + node[2].replace('"', '""') + '"')
+        else: # Too short for a trigram lookup (or a parameter column); LIKE scans instead
+            condition = f"{column} LIKE ? ESCAPE '\\'"
+            args.append("%" + re.sub(r'([\\%_])', r'\\\1', node[2]) + "%")
+        return f"png_info.{key} IN (SELECT {key} FROM {source} WHERE {condition})"
+
+    # --- Highlighting ---
+
+    def highlight_terms(self):
+        # [(label, regex source)] for every term that isn't negated, in query order
+        terms = {}
+        def collect(node):
+            if node[0] in ('and', 'or'):
+                for child in node[1]: collect(child)
+            elif node[0] == 'text': terms.setdefault(node[2], re.escape(node[2]))
+            elif node[0] == 'regex': terms.setdefault(f"/{node[2].pattern}/", node[2].pattern)
+        collect(self.root)
+        return list(terms.items())
+
+def compile_highlight_pattern(terms):
+    # One case-insensitive alternation over [(label, regex source)]; longer plain terms first so a term containing another wins
+    if not terms: return None
+    ordered = sorted(range(len(terms)), key=lambda i: -len(terms[i][0]))
+    try: return re.compile("|".join(f"(?P<t{i}>{terms[i][1]})" for i in ordered), re.IGNORECASE)
+    except re.error: return None # E.g. a regex with inline global flags, which can't be embedded
+
+def find_highlight_spans(text, pattern, terms):
+    """
+    Single pass of the compiled pattern over the text. Returns the match
+    spans as QTextDocument positions (UTF-16 code units, which differ from
+    str indices after characters outside the BMP, e.g. emoji) and the
+    number of matches per term label, in the order given.
+    """
+    spans, counts = [], {label: 0 for label, _ in terms}
+    has_astral = re.search('[\U00010000-\U0010FFFF]', text) is not None
+    shift, last = 0, 0
+    for match in pattern.finditer(text):
+        start, end = match.span()
+        if start == end: continue # An empty regex match has nothing to highlight
+        if has_astral:
+            shift += sum(1 for ch in text[last:start] if ord(ch) > 0xFFFF)
+            inner = sum(1 for ch in text[start:end] if ord(ch) > 0xFFFF)
+            spans.append((start + shift, end + shift + inner))
+            shift += inner
+            last = end
+        else:
+            spans.append((start, end))
+        counts[terms[int(match.lastgroup[1:])][0]] += 1
+    return spans, counts
+
+class MetadataStore:
+    """
+    Persistent SQLite cache of PNG text metadata, stored next to the config file.
+
+    Rows are revalidated by (size, mtime), so a lookup for an unchanged file
+    costs one stat() instead of opening the image. Safe to share between
+    threads; writes are committed in batches.
+
+    When SQLite has FTS5, the formatted text is also kept in a trigram
+    full-text table (rowid shared with png_info), which answers the
+    case-insensitive substring terms of a SearchQuery.
+
+    Parsed generation parameters live in generation_params (one row per
+    file that has any), indexed for filtering by model and seed. Perceptual
+    hashes for near-duplicate detection are kept in image_hashes by mtime.
+    """
+    COMMIT_EVERY = 200
+    # 2: text chunks read directly (includes text after IDAT, no Pillow-derived keys like dpi)
+    # 3: generation_params filled alongside png_info
+    # 4: png_info.embedded holds the embedded creation timestamp, for sorting without re-reading the info
+    SCHEMA_VERSION = 4
+    SEED_DIGITS = 20 # Seeds go up to 2**64 - 1, past SQLite's INTEGER; zero-padded text keeps them exact and ordered
+
+    def __init__(self, db_path):
+        self.lock = threading.Lock()
+        self.uncommitted = 0
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.create_function("REGEXP", 2, lambda pattern, value: value is not None and re.search(pattern, value, re.IGNORECASE) is not None,
+                                        deterministic=True)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS png_info (path TEXT PRIMARY KEY, size INTEGER, mtime REAL, info TEXT, embedded REAL)")
+        if 'embedded' not in {row[1] for row in self.connection.execute("PRAGMA table_info(png_info)")}:
+            self.connection.execute("ALTER TABLE png_info ADD COLUMN embedded REAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS generation_params (path TEXT PRIMARY KEY, prompt TEXT, negative TEXT, "
+                                "seed TEXT, steps INTEGER, sampler TEXT, cfg REAL, model TEXT, width INTEGER, height INTEGER)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS generation_params_model ON generation_params (model)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS generation_params_seed ON generation_params (seed)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS image_hashes (path TEXT PRIMARY KEY, mtime REAL, hash INTEGER)")
+        self.fts_available = self._create_fts_table()
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] < self.SCHEMA_VERSION:
+            # Rows written by an older reader may differ from what the current one returns; re-read lazily
+            self.connection.execute("DELETE FROM png_info")
+            if self.fts_available: self.connection.execute("DELETE FROM png_text")
+            self.connection.execute("DELETE FROM generation_params")
+            self.connection.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self.connection.commit()
+
+    def _create_fts_table(self):
+        if self.connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'png_text'").fetchone(): return True
+        try: self.connection.execute("CREATE VIRTUAL TABLE png_text USING fts5(text, tokenize='trigram')")
+        except sqlite3.OperationalError: return False # SQLite built without FTS5 / trigram tokenizer
+        # Rows cached before the full-text table existed have no text entry; let them be re-read
+        self.connection.execute("DELETE FROM png_info")
+        return True
+
+    def get_info(self, image_path):
+        if not image_path.lower().endswith('.png'): return []
+        try: stat = os.stat(image_path)
+        except OSError: return []
+        with self.lock:
+            row = self.connection.execute("SELECT size, mtime, info FROM png_info WHERE path = ?", (image_path,)).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime:
+            return json.loads(row[2])
+        info = read_png_info(image_path)
+        with self.lock: # Check and write together, so two threads reading the same file cannot interleave
+            row = self.connection.execute("SELECT size, mtime, info FROM png_info WHERE path = ?", (image_path,)).fetchone()
+            if row and row[0] == stat.st_size and row[1] == stat.st_mtime: return json.loads(row[2])
+            # An upsert keeps the row's rowid, so its png_text entry is replaced in place instead of orphaned
+            self.connection.execute("INSERT INTO png_info VALUES (?, ?, ?, ?, ?) ON CONFLICT(path) DO UPDATE SET "
+                                    "size = excluded.size, mtime = excluded.mtime, info = excluded.info, embedded = excluded.embedded",
+                                    (image_path, stat.st_size, stat.st_mtime, json.dumps(info, ensure_ascii=False), parse_embedded_timestamp(info)))
+            if self.fts_available:
+                rowid = self.connection.execute("SELECT rowid FROM png_info WHERE path = ?", (image_path,)).fetchone()[0]
+                self.connection.execute("INSERT OR REPLACE INTO png_text (rowid, text) VALUES (?, ?)", (rowid, format_png_info(info)))
+            self._store_params(image_path, parse_generation_params(info))
+            self.uncommitted += 1
+            if self.uncommitted >= self.COMMIT_EVERY: self._commit()
+        return info
+
+    @classmethod
+    def seed_key(cls, seed):
+        # Stored form of a seed (clamped, so an out-of-range bound still compares correctly)
+        return str(min(max(0, seed), 10 ** cls.SEED_DIGITS - 1)).zfill(cls.SEED_DIGITS)
+
+    def _store_params(self, image_path, params):
+        if not params:
+            self.connection.execute("DELETE FROM generation_params WHERE path = ?", (image_path,))
+            return
+        seed = params['seed']
+        values = [params[field] if field != 'seed' or seed is None else self.seed_key(seed) for field in GENERATION_FIELDS]
+        self.connection.execute(f"INSERT OR REPLACE INTO generation_params VALUES (?{', ?' * len(GENERATION_FIELDS)})", [image_path] + values)
+
+    def get_params(self, image_path):
+        # Generation parameters of the file ({} if none); re-reads the file first if it changed
+        self.get_info(image_path)
+        with self.lock:
+            row = self.connection.execute(f"SELECT {', '.join(GENERATION_FIELDS)} FROM generation_params WHERE path = ?", (image_path,)).fetchone()
+        if row is None: return {}
+        params = dict(zip(GENERATION_FIELDS, row))
+        if params['seed'] is not None: params['seed'] = int(params['seed'])
+        return params
+
+    def filter_paths(self, param_filter):
+        # Set of stored paths whose parameters satisfy param_filter (see params_match_filter)
+        clauses, values = [], []
+        if 'model' in param_filter:
+            clauses.append("model = ?")
+            values.append(param_filter['model'])
+        if 'seed' in param_filter:
+            clauses.append("seed BETWEEN ? AND ?")
+            values += [self.seed_key(seed) for seed in param_filter['seed']]
+        query = "SELECT path FROM generation_params" + (" WHERE " + " AND ".join(clauses) if clauses else "")
+        with self.lock:
+            return {row[0] for row in self.connection.execute(query, values)}
+
+    def sort_values(self, folder):
+        # path -> (mtime, embedded timestamp, model, seed) of every stored file under folder, in one query;
+        # what the info sort orders compare, so sorting never reads a file or queries per path. Stored paths are
+        # normalized (iter_image_files), so the range is too
+        prefix = os.path.join(os.path.normpath(folder), '')
+        with self.lock:
+            rows = self.connection.execute("SELECT png_info.path, png_info.mtime, embedded, model, seed FROM png_info "
+                                           "LEFT JOIN generation_params ON generation_params.path = png_info.path "
+                                           "WHERE png_info.path >= ? AND png_info.path < ?", (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1))).fetchall()
+        return {path: (mtime, embedded, model, None if seed is None else int(seed)) for path, mtime, embedded, model, seed in rows}
+
+    def forget(self, image_path):
+        with self.lock:
+            if self.fts_available:
+                self.connection.execute("DELETE FROM png_text WHERE rowid IN (SELECT rowid FROM png_info WHERE path = ?)", (image_path,))
+            self.connection.execute("DELETE FROM png_info WHERE path = ?", (image_path,))
+            self.connection.execute("DELETE FROM generation_params WHERE path = ?", (image_path,))
+            self.connection.execute("DELETE FROM image_hashes WHERE path = ?", (image_path,))
+            self.uncommitted += 1
+
+    def get_hashes(self):
+        # path -> (mtime, perceptual hash) of every cached hash; the caller checks mtime against the listing
+        with self.lock: rows = self.connection.execute("SELECT path, mtime, hash FROM image_hashes").fetchall()
+        return {path: (mtime, value & MASK64) for path, mtime, value in rows}
+
+    def put_hashes(self, rows):
+        # rows: (path, mtime, hash); hashes are unsigned 64-bit, stored as SQLite's signed INTEGER
+        with self.lock:
+            self.connection.executemany("INSERT OR REPLACE INTO image_hashes VALUES (?, ?, ?)",
+                                        [(path, mtime, value - (1 << 64) if value >> 63 else value) for path, mtime, value in rows])
+            self._commit()
+
+    def search(self, query, paths=()):
+        # Set of stored paths matching a SearchQuery, plus the files of paths that have no PNG metadata to store when
+        # the query matches empty text (e.g. `-sketch`), as SearchQuery.matches does for them
+        where, args = query.to_sql()
+        with self.lock:
+            result = {row[0] for row in self.connection.execute("SELECT path FROM png_info WHERE " + where, args)}
+        if query.matches(""): result.update(path for path in paths if not path.lower().endswith('.png'))
+        return result
+
+    def flush(self):
+        with self.lock: self._commit()
+
+    def _commit(self):
+        self.connection.commit()
+        self.uncommitted = 0
+
+class IndexSignals(QObject):
+    # (generation, files done, files total)
+    progress = pyqtSignal(int, int, int)
+
+class MetadataIndexTask(QRunnable):
+    """
+    Walks a folder listing on a worker thread and makes sure every PNG has an
+    up-to-date row (and full-text entry) in the MetadataStore.
+    """
+    def __init__(self, signals, store, generation, image_paths, cancel_event):
+        super().__init__()
+        self.signals = signals
+        self.store = store
+        self.generation = generation
+        self.image_paths = image_paths
+        self.cancel_event = cancel_event
+
+    def run(self):
+        total = len(self.image_paths)
+        for done, image_path in enumerate(self.image_paths, 1):
+            if self.cancel_event.is_set(): return
+            self.store.get_info(image_path)
+            if done % 500 == 0 and done < total: self.signals.progress.emit(self.generation, done, total)
+        self.store.flush()
+        self.signals.progress.emit(self.generation, total, total)
+
+class FolderScanSignals(QObject):
+    batch = pyqtSignal(int, list) # (generation, [(image path, sort record)])
+    finished = pyqtSignal(int, list) # (generation, directories scanned)
+    failed = pyqtSignal(int, str)
+    # (generation, directory, [(image path, sort record)], subdirectories, directory still exists)
+    directory_listed = pyqtSignal(int, str, list, list, bool)
+
+class FolderScanTask(QRunnable):
+    """
+    Enumerates the image files of a folder with os.scandir on a worker thread.
+
+    Paths are streamed back in batches that start at a single file (so the
+    first image can be shown immediately) and grow up to MAX_BATCH. Each path
+    comes with its stat_sort_record, so sorting never has to stat again.
+    In recursive mode subfolders are walked too (symlinks are not followed).
+    """
+    MAX_BATCH = 4096
+
+    def __init__(self, signals, generation, folder_path, cancel_event, recursive=False):
+        super().__init__()
+        self.signals = signals
+        self.generation = generation
+        self.folder_path = folder_path
+        self.cancel_event = cancel_event
+        self.recursive = recursive
+
+    def run(self):
+        batch, batch_size, directories = [], 1, []
+        try:
+            for item in iter_image_files(self.folder_path, self.recursive, directories):
+                if self.cancel_event.is_set(): return
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    self.signals.batch.emit(self.generation, batch)
+                    batch, batch_size = [], min(batch_size * 4, self.MAX_BATCH)
+        except OSError as e:
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        if batch: self.signals.batch.emit(self.generation, batch)
+        self.signals.finished.emit(self.generation, directories)
+
+class DirectoryListTask(QRunnable):
+    """Re-lists a single watched directory so changes can be applied incrementally."""
+    def __init__(self, signals, generation, directory):
+        super().__init__()
+        self.signals = signals
+        self.generation = generation
+        self.directory = directory
+
+    def run(self):
+        try: images, subdirectories = list_directory(self.directory)
+        except OSError:
+            self.signals.directory_listed.emit(self.generation, self.directory, [], [], False)
+            return
+        self.signals.directory_listed.emit(self.generation, self.directory, images, subdirectories, True)
+
+class MatchSearchSignals(QObject):
+    # (generation, set of matching paths)
+    finished = pyqtSignal(int, object)
+
+class MatchSearchTask(QRunnable):
+    """
+    Answers the search bar's query and/or the parameter filter from the
+    MetadataStore tables, off the GUI thread. Results for a superseded
+    query or listing are dropped by generation.
+    """
+    def __init__(self, signals, store, generation, query, image_paths, param_filter):
+        super().__init__()
+        self.signals = signals
+        self.store = store
+        self.generation = generation
+        self.query = query
+        self.image_paths = image_paths
+        self.param_filter = param_filter
+
+    def run(self):
+        paths = self.store.search(self.query, self.image_paths) if self.query else None
+        if self.param_filter:
+            filtered = self.store.filter_paths(self.param_filter)
+            paths = filtered if paths is None else paths & filtered
+        self.signals.finished.emit(self.generation, paths)
+
+class MatchScanSignals(QObject):
+    # (generation, files checked, files total)
+    progress = pyqtSignal(int, int, int)
+    # (generation, matching path or "" when the whole list was checked)
+    finished = pyqtSignal(int, str)
+
+class MatchScanTask(QRunnable):
+    """
+    Looks for the nearest image after start_index (in the given direction) whose
+    metadata matches the query (a SearchQuery, or None for none) and whose
+    generation parameters pass param_filter.
+
+    Files are checked in chunks ordered by distance; the metadata reads of a
+    chunk run in parallel and the first hit in chunk order is the nearest one.
+    """
+    PROGRESS_INTERVAL = 0.25 # seconds
+
+    def __init__(self, signals, store, generation, image_paths, start_index, direction, query, cancel_event, param_filter=None):
+        super().__init__()
+        self.signals = signals
+        self.store = store
+        self.generation = generation
+        self.image_paths = image_paths
+        self.start_index = start_index
+        self.direction = direction
+        self.query = query
+        self.cancel_event = cancel_event
+        self.param_filter = param_filter or {}
+
+    def is_match(self, image_path):
+        if self.cancel_event.is_set(): return False
+        if not (self.query or self.param_filter): return False
+        params = self.store.get_params(image_path) if self.param_filter or self.query.uses_params else None
+        if self.query and not self.query.matches(format_png_info(self.store.get_info(image_path)), params): return False
+        return not self.param_filter or params_match_filter(params, self.param_filter)
+
+    def run(self):
+        count = len(self.image_paths)
+        workers = min(32, (os.cpu_count() or 4) * 2)
+        chunk_size = workers * 8
+        order = [(self.start_index + self.direction * step) % count for step in range(1, count)]
+        last_progress = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for chunk_start in range(0, len(order), chunk_size):
+                if self.cancel_event.is_set(): return
+                chunk = [self.image_paths[i] for i in order[chunk_start:chunk_start + chunk_size]]
+                for image_path, matched in zip(chunk, executor.map(self.is_match, chunk)):
+                    if matched:
+                        self.signals.finished.emit(self.generation, image_path)
+                        return
+                if time.monotonic() - last_progress >= self.PROGRESS_INTERVAL:
+                    last_progress = time.monotonic()
+                    self.signals.progress.emit(self.generation, chunk_start + len(chunk), len(order))
+        if not self.cancel_event.is_set(): self.signals.finished.emit(self.generation, "")
+
+HASH_SIZE = 32 # Images are reduced to HASH_SIZE x HASH_SIZE grayscale before the DCT
+NEAR_DUPLICATE_DISTANCE = 6 # Most differing bits (of 64) for two images to count as near-duplicates
+
+def dct_rows(size, count):
+    # First count rows of the DCT-II matrix for size samples (unnormalized; only the comparison with the median matters)
+    return [[math.cos(math.pi * (2 * x + 1) * u / (2 * size)) for x in range(size)] for u in range(count)]
+
+HASH_DCT = dct_rows(HASH_SIZE, 8)
+
+def hash_pixels(image_path):
+    # HASH_SIZE x HASH_SIZE grayscale bytes of the image (aspect ignored), or None if it can't be decoded.
+    # The reader scales while decoding, so e.g. a JPEG is never decoded at full size
+    reader = QImageReader(image_path)
+    reader.setScaledSize(QSize(HASH_SIZE, HASH_SIZE))
+    image = reader.read()
+    if image.isNull(): return None
+    if image.width() != HASH_SIZE or image.height() != HASH_SIZE: # A reader that can't scale
+        image = image.scaled(HASH_SIZE, HASH_SIZE, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    image = image.convertToFormat(QImage.Format.Format_Grayscale8)
+    data, line = image.constBits().asstring(image.sizeInBytes()), image.bytesPerLine()
+    return b"".join(data[row * line:row * line + HASH_SIZE] for row in range(HASH_SIZE))
+
+def perceptual_hashes(pixel_blocks):
+    # 64-bit DCT hashes (pHash) of hash_pixels() blocks: the 8x8 lowest frequencies, one bit per coefficient above
+    # their median (DC excluded), first coefficient in the top bit. Vectorized over all blocks when NumPy is installed
+    if not pixel_blocks: return []
+    try: import numpy
+    except ImportError: numpy = None
+    if numpy is not None:
+        dct = numpy.array(HASH_DCT)
+        blocks = numpy.frombuffer(b"".join(pixel_blocks), dtype=numpy.uint8).reshape(-1, HASH_SIZE, HASH_SIZE).astype(numpy.float64)
+        low = (dct @ blocks @ dct.T).reshape(len(pixel_blocks), 64)
+        bits = low > numpy.median(low[:, 1:], axis=1, keepdims=True)
+        return [int.from_bytes(row.tobytes(), 'big') for row in numpy.packbits(bits, axis=1)]
+    hashes = []
+    for block in pixel_blocks:
+        # Separable: rows against the 8 basis vectors (32x8), then columns (8x8)
+        partial = [[sum(c * p for c, p in zip(basis, block[y * HASH_SIZE:(y + 1) * HASH_SIZE])) for basis in HASH_DCT] for y in range(HASH_SIZE)]
+        low = [sum(HASH_DCT[u][y] * partial[y][v] for y in range(HASH_SIZE)) for u in range(8) for v in range(8)]
+        median = sorted(low[1:])[31]
+        hashes.append(sum(1 << (63 - i) for i, value in enumerate(low) if value > median))
+    return hashes
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+class BKTree:
+    """
+    Burkhard-Keller tree over 64-bit hashes with Hamming distance. Child edges
+    are labelled with their distance to the parent, so a radius search only
+    follows edges within radius of the query's distance to each node (triangle
+    inequality) instead of comparing against every hash. Equal hashes share a node.
+    """
     def __init__(self):
+        self.root = None # [hash, items, {distance: child node}]
+
+    def add(self, value, item):
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value, radius):
+        # Items of every hash within radius of value
+        found, pending = [], [self.root] if self.root else []
+        while pending:
+            node = pending.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= radius: found.extend(node[1])
+            pending.extend(child for edge, child in node[2].items() if distance - radius <= edge <= distance + radius)
+        return found
+
+def cluster_near_duplicates(hashes, radius=NEAR_DUPLICATE_DISTANCE):
+    # Groups of two or more paths from {path: hash}, joined transitively (a chain of small steps ends up together)
+    paths_by_hash = {}
+    for path, value in hashes.items(): paths_by_hash.setdefault(value, []).append(path)
+    tree = BKTree()
+    for value in paths_by_hash: tree.add(value, value)
+    parent = {value: value for value in paths_by_hash} # Union-find over distinct hashes
+    def find(value):
+        while parent[value] != value:
+            parent[value] = parent[parent[value]]
+            value = parent[value]
+        return value
+    for value in paths_by_hash:
+        for other in tree.search(value, radius): parent[find(other)] = find(value)
+    groups = {}
+    for value, paths in paths_by_hash.items(): groups.setdefault(find(value), []).extend(paths)
+    return [paths for paths in groups.values() if len(paths) > 1]
+
+class DuplicateScanSignals(QObject):
+    # (generation, images hashed, images total)
+    progress = pyqtSignal(int, int, int)
+    # (generation, [[path, ...], ...] clusters, largest file first)
+    finished = pyqtSignal(int, list)
+
+class DuplicateScanTask(QRunnable):
+    """
+    Hashes every listed image (reusing the store's hashes of unchanged files)
+    and emits its near-duplicate clusters in listing order. Decoding runs on a
+    small thread pool; each chunk is hashed in one vectorized pass and cached.
+    """
+    CHUNK = 256
+
+    def __init__(self, signals, store, generation, entries, cancel_event):
+        super().__init__()
+        self.signals = signals
+        self.store = store
+        self.generation = generation
+        self.entries = entries # (path, mtime, size) in listing order
+        self.cancel_event = cancel_event
+
+    def run(self):
+        cached, hashes, pending = self.store.get_hashes(), {}, []
+        for path, mtime, _ in self.entries:
+            row = cached.get(path)
+            if row and row[0] == mtime: hashes[path] = row[1]
+            else: pending.append((path, mtime))
+        total = len(self.entries)
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 4)) as executor:
+            for chunk_start in range(0, len(pending), self.CHUNK):
+                if self.cancel_event.is_set(): return
+                chunk = pending[chunk_start:chunk_start + self.CHUNK]
+                decoded = [(entry, pixels) for entry, pixels in zip(chunk, executor.map(hash_pixels, (path for path, _ in chunk))) if pixels]
+                rows = [(path, mtime, value) for ((path, mtime), _), value in zip(decoded, perceptual_hashes([pixels for _, pixels in decoded]))]
+                self.store.put_hashes(rows)
+                hashes.update((path, value) for path, _, value in rows)
+                self.signals.progress.emit(self.generation, total - len(pending) + chunk_start + len(chunk), total)
+        if self.cancel_event.is_set(): return
+        order = {path: (-size, index) for index, (path, _, size) in enumerate(self.entries)}
+        clusters = [sorted(paths, key=order.__getitem__) for paths in cluster_near_duplicates(hashes)]
+        clusters.sort(key=lambda paths: min(order[path][1] for path in paths))
+        self.signals.finished.emit(self.generation, clusters)
+
+class ImageCache:
+    """
+    Least-recently-used cache of decoded images, bounded by memory cost.
+
+    Keys are (path, mtime, size) tuples: size is None for a full decode and
+    ('decoded', width, height) for a reduced decode (both stored as QImage),
+    and (width, height) for a viewport-scaled result (QPixmap).
+    """
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict() # key -> (image, cost)
+        self.total_bytes = 0
+
+    @staticmethod
+    def cost(image):
+        if isinstance(image, QImage): return image.sizeInBytes()
+        return image.width() * image.height() * max(image.depth(), 8) // 8
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None: return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, image):
+        cost = self.cost(image)
+        self.discard(key)
+        if cost > self.budget_bytes: return # Would evict everything else and still not fit
+        self.entries[key] = (image, cost)
+        self.total_bytes += cost
+        self.evict()
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry: self.total_bytes -= entry[1]
+
+    def invalidate(self, path):
+        for key in [k for k in self.entries if k[0] == path]:
+            self.discard(key)
+
+    def set_budget(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.evict()
+
+    def evict(self):
+        while self.total_bytes > self.budget_bytes and self.entries:
+            _, (_, cost) = self.entries.popitem(last=False)
+            self.total_bytes -= cost
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+
+class StageTimings:
+    """
+    Wall-clock timings of hot-path stages (decode, scale, metadata, highlight,
+    file operations), kept as a bounded window per stage for percentiles and
+    as a bounded event log for trace export. Safe to record from worker threads.
+    """
+    WINDOW = 500 # samples per stage used for percentiles
+    MAX_EVENTS = 100000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.samples = {} # stage -> deque of durations (seconds)
+        self.events = deque(maxlen=self.MAX_EVENTS) # (stage, start, duration, thread id)
+
+    @contextmanager
+    def measure(self, stage):
+        start = time.perf_counter()
+        try: yield
+        finally: self.record(stage, start, time.perf_counter() - start)
+
+    def record(self, stage, start, duration):
+        with self.lock:
+            self.samples.setdefault(stage, deque(maxlen=self.WINDOW)).append(duration)
+            self.events.append((stage, start - self.origin, duration, threading.get_ident()))
+
+    def percentiles(self, stage, points=(50, 90, 99)):
+        with self.lock: durations = sorted(self.samples.get(stage, ()))
+        if not durations: return {}
+        return {p: durations[min(len(durations) - 1, len(durations) * p // 100)] for p in points} # Nearest rank
+
+    def summary(self):
+        lines = [f"{'stage':<14}{'n':>5}{'p50':>9}{'p90':>9}{'p99':>9}  ms"]
+        with self.lock: stages = {stage: len(samples) for stage, samples in self.samples.items()}
+        for stage, count in sorted(stages.items()):
+            p = self.percentiles(stage)
+            lines.append(f"{stage:<14}{count:>5}{p[50] * 1000:>9.1f}{p[90] * 1000:>9.1f}{p[99] * 1000:>9.1f}")
+        return "\n".join(lines)
+
+    def export(self, path):
+        # .jsonl: one event per line (seconds); anything else: Chrome trace format (chrome://tracing, Perfetto)
+        with self.lock: events = list(self.events)
+        with open(path, 'w') as f:
+            if path.lower().endswith('.jsonl'):
+                for stage, start, duration, thread in events:
+                    f.write(json.dumps({'stage': stage, 'start': start, 'duration': duration, 'thread': thread}) + "\n")
+            else:
+                pid = os.getpid()
+                json.dump({'displayTimeUnit': 'ms', 'traceEvents': [
+                    {'name': stage, 'cat': 'slidescovery', 'ph': 'X', 'ts': start * 1e6, 'dur': duration * 1e6, 'pid': pid, 'tid': thread}
+                    for stage, start, duration, thread in events]}, f)
+        return len(events)
+
+class PillowFrameSource:
+    """
+    An APNG opened with Pillow, decoded one frame at a time by AnimationFrameTask.
+    Pillow composites each frame at full size while seeking; the frame is
+    scaled to the requested size before it is copied out as a QImage. Only one
+    task uses it at a time; close() during a decode leaves the closing to it.
+    """
+    def __init__(self, image_path):
+        self.image_path, self.image = image_path, None
+        self.lock, self.busy, self.closed = threading.Lock(), False, False
+
+    def decode(self, frame_index, size):
+        # The frame as a QImage of size (null on error or after close())
+        with self.lock:
+            if self.closed: return QImage()
+            self.busy = True
+        try:
+            from PIL import Image # Pillow library
+            if self.image is None: self.image = Image.open(self.image_path)
+            self.image.seek(frame_index % self.image.n_frames) # Cheap when moving forward; back to 0 re-reads from the start
+            frame = self.image if self.image.mode == 'RGBA' else self.image.convert('RGBA')
+            if frame.size != (size.width(), size.height()):
+                frame = frame.resize((size.width(), size.height()), Image.Resampling.BILINEAR, reducing_gap=2.0)
+            image = QImage(frame.tobytes(), frame.width, frame.height, frame.width * 4, QImage.Format.Format_RGBA8888).copy()
+        except (OSError, EOFError, ValueError): image = QImage()
+        with self.lock:
+            self.busy = False
+            if self.closed: self._close()
+        return image
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            if not self.busy: self._close()
+
+    def _close(self):
+        if self.image:
+            self.image.close()
+            self.image = None
+
+class AnimationFrameSignals(QObject):
+    decoded = pyqtSignal(int, QImage) # (frame index, frame; null if it could not be decoded)
+
+class AnimationFrameTask(QRunnable):
+    def __init__(self, signals, source, frame_index, decode_size):
+        super().__init__()
+        self.signals, self.source, self.frame_index, self.decode_size = signals, source, frame_index, decode_size
+
+    def run(self):
+        self.signals.decoded.emit(self.frame_index, self.source.decode(self.frame_index, self.decode_size))
+
+class AnimationPlayer(QObject):
+    """
+    Plays an animated GIF or APNG one frame at a time. GIFs go through QMovie
+    with frame caching off; APNGs (which Qt's PNG reader shows as a still)
+    through Pillow's sequential seek, one frame ahead on a worker thread.
+    Only the current and next frame are held, decoded at decode_size, so
+    memory does not grow with the number of frames. Starts paused; frames
+    arrive through the frame signal.
+    """
+    frame = pyqtSignal(QImage)
+
+    def __init__(self, image_path, kind, delays, decode_size, parent=None):
+        super().__init__(parent)
+        self.image_path, self.delays, self.decode_size = image_path, delays, decode_size
+        self.loop_duration = sum(delays) # seconds
+        self.paused = True
+        self.movie = self.source = None
+        self.frame_index = 0
+        self.next_frame, self.decoding = None, False # Decoded (index, QImage) waiting for its turn
+        self.frame_timer = QTimer(self) # Paces the Pillow frames
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.timeout.connect(self.show_next_frame)
+        if kind == 'gif':
+            self.movie = QMovie(image_path, parent=self)
+            self.movie.setCacheMode(QMovie.CacheMode.CacheNone)
+            self.movie.setScaledSize(decode_size)
+            self.movie.frameChanged.connect(lambda _: self.frame.emit(self.movie.currentImage()))
+        else:
+            self.source = PillowFrameSource(image_path)
+            self.frame_signals = AnimationFrameSignals() # No parent: a task still running after deleteLater() keeps it alive
+            self.frame_signals.decoded.connect(self.on_frame_decoded)
+
+    def set_paused(self, paused):
+        if paused == self.paused: return
+        self.paused = paused
+        if self.movie:
+            if self.movie.state() != QMovie.MovieState.NotRunning: self.movie.setPaused(paused)
+            elif not paused: self.movie.start()
+        elif paused: self.frame_timer.stop()
+        else:
+            self.frame_timer.start(int(self.delays[self.frame_index] * 1000))
+            self.decode_next_frame()
+
+    def decode_next_frame(self):
+        if self.decoding or self.next_frame is not None or self.source.closed: return
+        self.decoding = True
+        QThreadPool.globalInstance().start(AnimationFrameTask(self.frame_signals, self.source, (self.frame_index + 1) % len(self.delays), self.decode_size))
+
+    def on_frame_decoded(self, frame_index, image):
+        self.decoding = False
+        if self.source.closed: return
+        if image.isNull(): # Damaged past the first frames: keep showing the last good one
+            self.stop()
+            return
+        self.next_frame = (frame_index, image)
+        if not self.paused and not self.frame_timer.isActive(): self.show_next_frame() # Its turn came while decoding
+
+    def show_next_frame(self):
+        if self.next_frame is None: return # Still decoding; shown as soon as it arrives
+        (self.frame_index, image), self.next_frame = self.next_frame, None
+        self.frame.emit(image)
+        if not self.paused:
+            self.frame_timer.start(int(self.delays[self.frame_index] * 1000))
+            self.decode_next_frame()
+
+    def stop(self):
+        self.paused = True
+        self.frame_timer.stop()
+        if self.movie: self.movie.stop()
+        if self.source: self.source.close()
+
+class StartupProfile:
+    """
+    Named marks from STARTUP_START to a fully loaded folder, for --profile-startup.
+    Each mark ends the phase that began at the previous one; repeated marks are ignored.
+    """
+    TARGET_FIRST_IMAGE = 0.5 # seconds; the time-to-first-image budget the report checks
+
+    def __init__(self, origin):
+        self.marks = [("start", origin)]
+
+    def mark(self, phase):
+        if phase not in dict(self.marks): self.marks.append((phase, time.perf_counter()))
+
+    def elapsed(self, phase):
+        at = dict(self.marks).get(phase)
+        return None if at is None else at - self.marks[0][1]
+
+    def report(self):
+        lines = [f"{'phase':<20}{'ms':>9}{'total':>9}"]
+        for (_, previous), (phase, at) in zip(self.marks, self.marks[1:]):
+            lines.append(f"{phase:<20}{(at - previous) * 1000:>9.1f}{(at - self.marks[0][1]) * 1000:>9.1f}")
+        first_image = self.elapsed("first image")
+        if first_image is not None:
+            verdict = "within" if first_image <= self.TARGET_FIRST_IMAGE else "OVER"
+            lines.append(f"time to first image {first_image * 1000:.0f} ms, {verdict} the {self.TARGET_FIRST_IMAGE * 1000:.0f} ms target")
+        return "\n".join(lines)
+
+startup_profile = StartupProfile(STARTUP_START)
+
+MASK64 = (1 << 64) - 1
+
+def splitmix64(value):
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+class RandomPermutation:
+    """
+    Seeded pseudo-random bijection on range(size), evaluated per index in O(1)
+    memory: a small Feistel network over the smallest even-bit power of two
+    covering size, cycle-walking until the result lands inside range(size)
+    (fewer than four rounds trips on average). Walking steps 0, 1, 2, ...
+    visits every index exactly once per size steps.
+    """
+    ROUNDS = 4
+
+    def __init__(self, size, seed):
+        self.size = size
+        self.seed = seed
+        bits = max(2, (size - 1).bit_length())
+        self.half_bits = (bits + 1) // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        self.keys = [splitmix64(seed * self.ROUNDS + r) for r in range(self.ROUNDS)]
+
+    def _encrypt(self, value):
+        left, right = value >> self.half_bits, value & self.half_mask
+        for key in self.keys:
+            left, right = right, left ^ (splitmix64(right ^ key) & self.half_mask)
+        return (left << self.half_bits) | right
+
+    def __len__(self):
+        return self.size
+
+    def _decrypt(self, value):
+        left, right = value >> self.half_bits, value & self.half_mask
+        for key in reversed(self.keys):
+            left, right = right ^ (splitmix64(left ^ key) & self.half_mask), left
+        return (left << self.half_bits) | right
+
+    def __getitem__(self, step):
+        value = self._encrypt(step % self.size)
+        while value >= self.size: value = self._encrypt(value)
+        return value
+
+    def index(self, value):
+        # The step in range(size) that lands on value
+        step = self._decrypt(value)
+        while step >= self.size: step = self._decrypt(step)
+        return step
+
+class ImageLoadSignals(QObject):
+    # (generation, image_path, mtime at decode time, decode_cache_tag, decoded image)
+    loaded = pyqtSignal(int, str, object, object, QImage)
+
+class ImageLoadTask(QRunnable):
+    """
+    Decodes a single image file into a QImage on a worker thread.
+
+    QImage (unlike QPixmap) is safe to create outside the GUI thread, so the
+    result is handed back through a queued signal and converted there.
+    """
+    def __init__(self, signals, generation, image_path, target_size=None):
+        super().__init__()
+        self.signals = signals
+        self.generation = generation
+        self.image_path = image_path
+        self.target_size = target_size
+
+    def run(self):
+        mtime = file_mtime(self.image_path)
+        image = decode_image(self.image_path, self.target_size)
+        self.signals.loaded.emit(self.generation, self.image_path, mtime, decode_cache_tag(self.target_size), image)
+
+def thumbnail_cache_file(cache_dir, image_path, mtime):
+    digest = hashlib.sha1(f"{image_path}|{mtime}".encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, digest[:2], digest + ".png")
+
+class ThumbnailSignals(QObject):
+    loaded = pyqtSignal(str, QImage) # (image path, thumbnail)
+
+class ThumbnailTask(QRunnable):
+    """
+    Produces the thumbnail of one image on a worker thread, reading it from the
+    on-disk thumbnail cache when present and generating and storing it otherwise.
+    """
+    def __init__(self, signals, cache_dir, image_path, mtime):
+        super().__init__()
+        self.signals = signals
+        self.cache_dir = cache_dir
+        self.image_path = image_path
+        self.mtime = mtime
+
+    def run(self):
+        cache_file = thumbnail_cache_file(self.cache_dir, self.image_path, self.mtime)
+        image = QImage(cache_file) if os.path.exists(cache_file) else QImage()
+        if not image.isNull():
+            try: os.utime(cache_file) # Marks it as recently used for ThumbnailCachePruneTask
+            except OSError: pass
+        else:
+            image = decode_image(self.image_path, QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+            if not image.isNull():
+                try:
+                    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+                    # Write under a temporary name so a half-written file is never picked up
+                    if image.save(cache_file + ".tmp", "PNG"): os.replace(cache_file + ".tmp", cache_file)
+                except OSError: pass
+        self.signals.loaded.emit(self.image_path, image)
+
+class ThumbnailCachePruneTask(QRunnable):
+    """
+    Keeps the on-disk thumbnail cache under max_bytes. Entries are keyed by
+    path and mtime, so thumbnails of edited, moved or deleted images are never
+    read again; once the cache is over the cap, the least recently used
+    thumbnails (by file mtime, which ThumbnailTask refreshes on every hit) are
+    deleted down to three quarters of it. Leftover temporary files go too.
+    """
+    STALE_TEMP_AGE = 3600 # seconds
+
+    def __init__(self, cache_dir, max_bytes):
+        super().__init__()
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def run(self):
+        files, total, now = [], 0, time.time()
+        try:
+            with os.scandir(self.cache_dir) as shards: directories = [shard.path for shard in shards if shard.is_dir(follow_symlinks=False)]
+        except OSError: return # No cache yet
+        for directory in directories:
+            try: entries = list(os.scandir(directory))
+            except OSError: continue
+            for entry in entries:
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                    if entry.name.endswith('.tmp'):
+                        if now - stat.st_mtime > self.STALE_TEMP_AGE: os.remove(entry.path)
+                        continue
+                except OSError: continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_bytes: return
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_bytes * 3 // 4: break
+            try: os.remove(path)
+            except OSError: continue
+            total -= size
+
+class ThumbnailModel(QAbstractListModel):
+    """
+    List model exposing SlideshowWidget.image_files to the thumbnail view.
+
+    Thumbnails are only requested from data(), which the view calls for the
+    cells it actually paints, so a huge folder never generates thumbnails for
+    off-screen files. Decoded thumbnails are kept in a small in-memory LRU.
+    """
+    MEMORY_LIMIT = 1000
+
+    def __init__(self, widget, cache_dir):
+        super().__init__(widget)
+        self.widget = widget
+        self.cache_dir = cache_dir
+        self.pixmaps = OrderedDict() # path -> QPixmap
+        self.pending = set()
+        self.request_counter = 0
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(1, min(4, QThreadPool.globalInstance().maxThreadCount())))
+        self.signals = ThumbnailSignals(self)
+        self.signals.loaded.connect(self.on_thumbnail_loaded)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.widget.image_files)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.widget.image_files): return None
+        path = self.widget.image_files[index.row()]
+        if role == Qt.ItemDataRole.ToolTipRole: return os.path.basename(path)
+        if role == Qt.ItemDataRole.DecorationRole:
+            pixmap = self.pixmaps.get(path)
+            if pixmap is not None:
+                self.pixmaps.move_to_end(path)
+                return pixmap
+            self.request(path, self.widget.image_files.record(index.row())[1])
+        return None
+
+    def request(self, path, modified):
+        if path in self.pending: return
+        self.pending.add(path)
+        self.request_counter += 1
+        # Higher priority for newer requests: the cells on screen now jump ahead of ones scrolled past
+        self.pool.start(ThumbnailTask(self.signals, self.cache_dir, path, modified), self.request_counter)
+
+    def on_thumbnail_loaded(self, path, image):
+        self.pending.discard(path)
+        if image.isNull(): return
+        self.pixmaps[path] = QPixmap.fromImage(image)
+        while len(self.pixmaps) > self.MEMORY_LIMIT: self.pixmaps.popitem(last=False)
+        row = self.widget.image_files.position(path)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+    def forget(self, path):
+        self.pixmaps.pop(path, None)
+
+    def reset(self):
+        # image_files was rebuilt or reordered; queued requests are for rows that no longer exist
+        self.pool.clear()
+        self.pending.clear()
+        self.beginResetModel()
+        self.endResetModel()
+
+# Errors worth retrying: busy/locked files and flaky network shares (winerror: sharing/lock violation, network drops)
+TRANSIENT_ERRNOS = {errno.EAGAIN, errno.EBUSY, errno.ETIMEDOUT, errno.EINTR}
+TRANSIENT_WINERRORS = {32, 33, 53, 64, 121}
+
+def is_transient_error(error):
+    return isinstance(error, OSError) and (error.errno in TRANSIENT_ERRNOS or getattr(error, 'winerror', None) in TRANSIENT_WINERRORS)
+
+TRANSFER_MODES = ('auto', 'reflink', 'hardlink', 'copy', 'move')
+FICLONE = 0x40049409 # Linux ioctl: share extents copy-on-write (Btrfs, XFS, bcachefs...)
+
+def reflink_file(source_path, dest_path):
+    import fcntl # POSIX only; raises ImportError on Windows
+    with open(source_path, 'rb') as source, open(dest_path, 'wb') as dest:
+        fcntl.ioctl(dest.fileno(), FICLONE, source.fileno())
+    shutil.copystat(source_path, dest_path)
+
+def hardlink_file(source_path, dest_path):
+    os.link(source_path, dest_path)
+
+def transfer_file(source_path, dest_folder, mode):
+    """
+    Puts source_path into dest_folder using the requested mode and returns the strategy actually used.
+
+    'auto' tries a reflink, then a hardlink, and falls back to a copy; 'reflink'
+    and 'hardlink' fall back to a copy when the destination cannot support them
+    (e.g. another filesystem). An existing file of the same name is replaced.
+    """
+    dest_path = os.path.join(dest_folder, os.path.basename(source_path))
+    if os.path.normcase(os.path.abspath(dest_path)) == os.path.normcase(os.path.abspath(source_path)):
+        raise shutil.SameFileError(f"{source_path!r} is already in {dest_folder!r}")
+    if os.path.exists(dest_path) and os.path.samefile(source_path, dest_path):
+        os.remove(dest_path) # An earlier hardlink of this very file; drop it so the new transfer is not a no-op copy onto itself
+    if mode == 'move':
+        if os.path.exists(dest_path): os.remove(dest_path)
+        shutil.move(source_path, dest_path)
+        return 'move'
+    if mode in ('auto', 'reflink', 'hardlink'):
+        same_device = os.stat(source_path).st_dev == os.stat(dest_folder).st_dev
+        candidates = {'auto': [('reflink', reflink_file), ('hardlink', hardlink_file)],
+                      'reflink': [('reflink', reflink_file)], 'hardlink': [('hardlink', hardlink_file)]}[mode]
+        if same_device:
+            for strategy, link in candidates:
+                # Build under a temporary name, then swap in, so a failed attempt never leaves a partial file
+                temp_path = dest_path + ".slidescovery-tmp"
+                try:
+                    link(source_path, temp_path)
+                    os.replace(temp_path, dest_path)
+                    return strategy
+                except (OSError, ImportError):
+                    if os.path.exists(temp_path): os.remove(temp_path)
+    shutil.copy2(source_path, dest_path)
+    return 'copy' if mode in ('auto', 'copy') else 'copy (fallback)'
+
+class FileOperation:
+    """A favorite/like transfer or a trash move of one file, as queued in FileOperationQueue."""
+    def __init__(self, operation_id, kind, source_path, dest_folder=None, label=None, mode='copy'):
+        self.operation_id = operation_id
+        self.kind = kind # 'transfer' or 'trash'
+        self.source_path = source_path
+        self.dest_folder = dest_folder
+        self.label = label # Display name of the destination, e.g. "Favorites"
+        self.mode = mode # One of TRANSFER_MODES, for transfers
+        self.strategy = None # What transfer_file ended up doing
+        self.attempts = 0
+
+    def removes_source(self):
+        return self.kind == 'trash' or (self.kind == 'transfer' and self.mode == 'move')
+
+    def execute(self):
+        if self.kind == 'transfer': self.strategy = transfer_file(self.source_path, self.dest_folder, self.mode)
+        elif self.kind == 'trash':
+            import send2trash # Imported on first use; it loads platform bindings startup doesn't need
+            send2trash.send2trash(self.source_path)
+
+class FileOperationSignals(QObject):
+    finished = pyqtSignal(int, str, bool) # (operation id, error message or "", error is transient)
+
+class FileOperationTask(QRunnable):
+    def __init__(self, signals, operation, timings):
+        super().__init__()
+        self.signals = signals
+        self.operation = operation
+        self.timings = timings
+
+    def run(self):
+        try:
+            with self.timings.measure(f"file_{self.operation.kind}"): self.operation.execute()
+            self.signals.finished.emit(self.operation.operation_id, "", False)
+        except Exception as e:
+            self.signals.finished.emit(self.operation.operation_id, str(e) or type(e).__name__, is_transient_error(e))
+
+class FileOperationQueue(QObject):
+    """
+    Runs file operations on a worker pool so the GUI never waits on disk or network I/O.
+
+    Operations on the same source file run strictly in submission order (a
+    favorite followed by a trash of the same file copies first); different
+    files proceed in parallel. Transient errors are retried with backoff.
+    """
+    succeeded = pyqtSignal(object) # FileOperation
+    failed = pyqtSignal(object, str) # (FileOperation, error message)
+    status_changed = pyqtSignal(int, int) # (pending, failed)
+    MAX_ATTEMPTS = 4
+
+    def __init__(self, parent=None, timings=None):
+        super().__init__(parent)
+        self.timings = timings or StageTimings()
+        self.queues = {} # source path -> deque of FileOperation; the head is running or waiting to retry
+        self.operations = {} # operation id -> FileOperation
+        self.next_id = 0
+        self.failed_count = 0
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(4)
+        self.signals = FileOperationSignals(self)
+        self.signals.finished.connect(self.on_finished)
+
+    def submit(self, kind, source_path, dest_folder=None, label=None, mode='copy'):
+        self.next_id += 1
+        operation = FileOperation(self.next_id, kind, source_path, dest_folder, label, mode)
+        self.operations[operation.operation_id] = operation
+        queue = self.queues.setdefault(source_path, deque())
+        queue.append(operation)
+        if len(queue) == 1: self._start(operation)
+        self._emit_status()
+        return operation
+
+    def pending_count(self):
+        return len(self.operations)
+
+    def _start(self, operation):
+        operation.attempts += 1
+        self.pool.start(FileOperationTask(self.signals, operation, self.timings))
+
+    def on_finished(self, operation_id, error, transient):
+        operation = self.operations.get(operation_id)
+        if operation is None: return
+        if error and transient and operation.attempts < self.MAX_ATTEMPTS:
+            QTimer.singleShot(500 * 2 ** (operation.attempts - 1), lambda: self._start(operation))
+            return
+        del self.operations[operation_id]
+        queue = self.queues[operation.source_path]
+        queue.popleft()
+        if queue: self._start(queue[0])
+        else: del self.queues[operation.source_path]
+        if error:
+            self.failed_count += 1
+            self.failed.emit(operation, error)
+        else:
+            self.succeeded.emit(operation)
+        self._emit_status()
+
+    def wait_for_done(self, timeout=10.0):
+        # On exit: keep delivering results (which starts queued follow-ups) until everything is done
+        deadline = time.monotonic() + timeout
+        while self.operations and time.monotonic() < deadline:
+            self.pool.waitForDone(100)
+            QApplication.processEvents()
+
+    def _emit_status(self):
+        self.status_changed.emit(self.pending_count(), self.failed_count)
+
+class SlideshowWidget(QWidget):
+    MAX_HIGHLIGHTS = 5000 # More selections than this only slow down painting
+    SNAPSHOT_VERSION = 1 # Bumped when the startup snapshot's layout changes; older ones are ignored
+    ANIMATION_FRAME_BYTES = 64 * 1024 * 1024 # Cap on one decoded animation frame; larger GIFs are decoded scaled down, larger APNGs stay still
+    MAX_ANIMATION_HOLD = 60000 # ms; longest a slide is held to finish an animation's loop
+
+    def __init__(self, profile_startup=False):
         super().__init__()
         # --- Attributes ---
+        self.profile_startup = profile_startup # Print startup_profile once the folder is loaded
+        self.deferred_startup_scheduled = self.deferred_startup_done = False
         self.CONFIG_FILE = self.get_config_path()
         self.source_folder, self.favorites_folder, self.likes_folder = None, None, None
         self.current_pixmap = None
-        self.image_files, self.current_index, self.is_paused = [], 0, False
+        self.current_image_key = None # (path, mtime) of the displayed image
+        self.animation = None # AnimationPlayer of the displayed image, if it is animated
+        self.finish_animations = False # Hold an animated slide until one loop has played
+        self.cache_budget_mb = 512
+        self.image_cache = ImageCache(self.cache_budget_mb * 1024 * 1024)
+        self.image_files, self.current_index, self.is_paused = FileTable(), 0, False
         self.current_sort_order = "random"
         self.current_sort_direction = "asc" # New attribute for sort direction
         self.slideshow_interval = 5000
         self.confirm_delete = True
+        self.favorites_transfer_mode = 'auto'
+        self.likes_transfer_mode = 'auto'
         self.skip_non_matching = False
+        self.param_filter = {} # {'model': name, 'seed': [low, high]}; restricts navigation like a search
+        # Random order walks a lazy permutation of image_files (kept in path order) instead of shuffling it
+        self.walk_folder, self.walk_seed, self.walk_step = None, 0, 0
+        self.walk_start = 0 # Step the walk began at; the counter shows the position in the current round from it
+        self.walk_permutation_cache, self.walk_domain, self.walk_domain_stale = None, None, False
+        self.match_walk_steps = None # (walk permutation, sorted walk steps of match_paths), built on demand
+        self.info_sort_values = None # MetadataStore.sort_values for the info sort orders, read once per sort
         self.info_panel_visible = False
+        self.thumbnails_visible = False
         self.is_skipping = False
         self.old_pos = None
         self.feedback_position = 'center' # To store current feedback position
 
+        # --- Prefetch ---
+        self.prefetch_ahead, self.prefetch_behind = 3, 1
+        self.prefetch_generation = 0 # Bumped whenever queued work becomes stale
+        self.prefetch_pending = set() # (path, decode_cache_tag) pairs queued on the pool
+        self.prefetch_pool = QThreadPool(self)
+        self.prefetch_pool.setMaxThreadCount(max(1, min(4, QThreadPool.globalInstance().maxThreadCount())))
+        self.prefetch_signals = ImageLoadSignals(self)
+        self.prefetch_signals.loaded.connect(self.on_prefetch_loaded)
+
+        self.metadata_store = MetadataStore(os.path.join(os.path.dirname(self.CONFIG_FILE), "metadata_cache.sqlite3"))
+
+        # --- Search index ---
+        self.index_generation = 0
+        self.index_cancel_event = threading.Event()
+        self.index_progress = (0, 0) # (done, total) of the background indexing pass
+        self.match_paths = None # Paths matching the search bar, or None when there is no query
+        self.match_positions = None # Sorted indices in image_files of match_paths
+        self.match_search_generation = 0
+        self.match_search_pending = False # A MatchSearchTask is running; match_paths may be for an older query
+        self.match_search_signals = MatchSearchSignals(self)
+        self.match_search_signals.finished.connect(self.on_match_search_finished)
+        self.index_signals = IndexSignals(self)
+        self.index_signals.progress.connect(self.on_index_progress)
+        self.scan_generation = 0
+        self.scan_cancel_event = threading.Event()
+        self.scan_signals = MatchScanSignals(self)
+        self.scan_signals.progress.connect(self.on_match_scan_progress)
+        self.scan_signals.finished.connect(self.on_match_scan_finished)
+
+        # --- Near-duplicates ---
+        self.duplicate_scan_generation = 0
+        self.duplicate_scan_cancel_event = threading.Event()
+        self.duplicate_signals = DuplicateScanSignals(self)
+        self.duplicate_signals.progress.connect(self.on_duplicate_scan_progress)
+        self.duplicate_signals.finished.connect(self.on_duplicate_scan_finished)
+        self.duplicate_clusters = None # Clusters under review (lists of paths), or None outside review mode
+        self.duplicate_cluster = self.duplicate_member = 0 # Position in the review
+
+        # --- Folder enumeration ---
+        self.folder_scan_generation = 0
+        self.folder_scan_cancel_event = threading.Event()
+        self.is_loading_folder = False
+        self.folder_image_shown = False # Whether the folder being loaded has displayed anything yet
+        self.pending_focus_path = None # Image to select once loading finishes (drag & drop)
+        self.snapshot_path = os.path.join(os.path.dirname(self.CONFIG_FILE), "startup_snapshot.bin")
+        self.snapshot_info = {} # path -> (mtime, info text) saved with the startup snapshot
+        self.revalidation_entries = None # path -> stat_sort_record while a scan revalidates a restored snapshot
+        self.folder_scan_signals = FolderScanSignals(self)
+        self.folder_scan_signals.batch.connect(self.on_folder_scan_batch)
+        self.folder_scan_signals.finished.connect(self.on_folder_scan_finished)
+        self.folder_scan_signals.failed.connect(self.on_folder_scan_failed)
+        self.folder_scan_signals.directory_listed.connect(self.on_directory_listed)
+
+        # --- Watching ---
+        self.recursive = False
+        self.current_folder = None
+        self.dir_index = {} # directory -> set of basenames (interned in image_files) of its images in image_files
+        self.dirty_directories = set()
+        self.file_watcher = QFileSystemWatcher(self)
+        self.file_watcher.directoryChanged.connect(self.on_directory_changed)
+        self.watch_timer = QTimer(self) # Coalesces bursts of change notifications
+        self.watch_timer.setSingleShot(True)
+        self.watch_timer.setInterval(300)
+        self.watch_timer.timeout.connect(self.rescan_dirty_directories)
+        self.watch_index_signals = IndexSignals(self)
+        self.watch_index_signals.progress.connect(lambda generation, done, total: self.refresh_matches() if done == total else None)
+
+        self.stage_timings = StageTimings()
+        self.timing_hud_visible = False
+        self.file_operations = FileOperationQueue(self, self.stage_timings)
+        self.file_operations.succeeded.connect(self.on_file_operation_succeeded)
+        self.file_operations.failed.connect(self.on_file_operation_failed)
+        self.file_operations.status_changed.connect(self.on_file_operation_status)
+
         # --- Initialization ---
+        self.mark_startup("attributes")
         self.init_ui()
+        self.mark_startup("init_ui")
         self.load_settings()
+        self.mark_startup("load_settings")
 
         self.timer = QTimer(self)
         self.timer.timeout.connect(lambda: self.show_next_image(manual=False))
 
         if self.source_folder and os.path.exists(self.source_folder):
-            self._set_tree_view_root() # Call helper to set up tree view
-            self.load_images(self.source_folder)
-            self.apply_sorting()
-            self.current_index = 0
-            self.start_slideshow()
+            # The tree is rooted by run_deferred_startup, after the first image
+            snapshot = self.read_startup_snapshot(self.source_folder)
+            self.mark_startup("read snapshot")
+            self.load_images(self.source_folder, snapshot=snapshot)
         else:
+            self.schedule_deferred_startup()
             self.prompt_for_folder('source')
 
     def get_config_path(self):
-        path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
-        app_dir = os.path.join(path, "Slidescovery")
-        if not os.path.exists(app_dir):
-            os.makedirs(app_dir)
-        return os.path.join(app_dir, "slideshow_config.json")
+        return get_config_path()
 
     def init_ui(self):
         self.setWindowFlags(Qt.WindowType.FramelessWindowHint)
@@ -170,6 +2216,8 @@ class SlideshowWidget(QWidget):
         top_controls_layout = QHBoxLayout()
         self.tree_toggle_button = self.create_button("<<", self.toggle_tree_view, "Toggle Tree View")
         top_controls_layout.addWidget(self.tree_toggle_button)
+        self.thumbnail_toggle_button = self.create_button("▦", self.toggle_thumbnail_view, "Toggle Thumbnails (T)")
+        top_controls_layout.addWidget(self.thumbnail_toggle_button)
         top_controls_layout.addStretch()
 
         self.radio_group = QButtonGroup(self)
@@ -180,9 +2228,29 @@ class SlideshowWidget(QWidget):
         self.radio_time = self.create_radio_button("Time")
         self.radio_group.addButton(self.radio_time)
         top_controls_layout.addWidget(self.radio_time)
+        self.radio_modified = self.create_radio_button("Modified")
+        self.radio_group.addButton(self.radio_modified)
+        top_controls_layout.addWidget(self.radio_modified)
+        self.radio_size = self.create_radio_button("Size")
+        self.radio_group.addButton(self.radio_size)
+        top_controls_layout.addWidget(self.radio_size)
+        self.radio_embedded = self.create_radio_button("Embedded Date")
+        self.radio_embedded.setToolTip("Creation time stored in the image metadata (falls back to file time)")
+        self.radio_group.addButton(self.radio_embedded)
+        top_controls_layout.addWidget(self.radio_embedded)
+        self.radio_model = self.create_radio_button("Model")
+        self.radio_model.setToolTip("Checkpoint named in the generation parameters")
+        self.radio_group.addButton(self.radio_model)
+        top_controls_layout.addWidget(self.radio_model)
+        self.radio_seed = self.create_radio_button("Seed")
+        self.radio_group.addButton(self.radio_seed)
+        top_controls_layout.addWidget(self.radio_seed)
         self.radio_alpha = self.create_radio_button("Alphabetical")
         self.radio_group.addButton(self.radio_alpha)
         top_controls_layout.addWidget(self.radio_alpha)
+        self.sort_order_buttons = {"random": self.radio_random, "time": self.radio_time, "modified": self.radio_modified,
+                                   "size": self.radio_size, "embedded": self.radio_embedded,
+                                   "model": self.radio_model, "seed": self.radio_seed, "alpha": self.radio_alpha}
 
         # Add sort direction radio buttons
         top_controls_layout.addSpacing(20) # Add some space
@@ -208,13 +2276,9 @@ class SlideshowWidget(QWidget):
         tree_view_container.setContentsMargins(0,0,0,0)
         tree_view_container.setSpacing(5)
 
-        self.file_system_model = QFileSystemModel()
-        self.file_system_model.setFilter(QDir.Filter.Dirs | QDir.Filter.NoDotAndDotDot)
-        self.file_system_model.setNameFilterDisables(False)
+        self.file_system_model = None # Created by ensure_tree_model once the first image is up
         self.tree_view = QTreeView(self)
-        self.tree_view.setModel(self.file_system_model)
         self.tree_view.setHeaderHidden(True)
-        for i in range(1, 4): self.tree_view.hideColumn(i)
         self.tree_view.setFocusPolicy(Qt.FocusPolicy.NoFocus)
         self.tree_view.clicked.connect(self.on_tree_view_clicked)
         self.tree_view.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
@@ -241,11 +2305,47 @@ class SlideshowWidget(QWidget):
         info_pane_layout.setSpacing(5)
 
         self.info_search_bar = QLineEdit()
-        self.info_search_bar.setPlaceholderText("Search in PNG info (space-separated)...")
-        self.info_search_bar.setStyleSheet("QLineEdit { background-color: #282828; color: white; border: 1px solid #555; border-radius: 3px; padding: 5px; } QMenu { background-color: #333; color: white; } QMenu::item:selected { background-color: #55aaff; }")
-        self.info_search_bar.textChanged.connect(self.highlight_info_text)
+        self.info_search_bar.setPlaceholderText('Search in PNG info: words, "phrases", OR, -exclude, model:name, seed:1..99, /regex/')
+        self.info_search_bar.setStyleSheet("QLineEdit { background-color: #282828; color: white; border: 1px solid #555; border-radius: 3px; padding: 5px; } QLineEdit[invalid='true'] { border: 1px solid #FF6B6B; } QMenu { background-color: #333; color: white; } QMenu::item:selected { background-color: #55aaff; }")
+        self.info_search_bar.textChanged.connect(lambda: self.highlight_timer.start())
+        self.info_search_bar.textChanged.connect(lambda: self.match_refresh_timer.start())
         info_pane_layout.addWidget(self.info_search_bar)
 
+        self.match_count_label = QLabel(self)
+        self.match_count_label.setStyleSheet("color: #AAAAAA; padding: 0 5px;")
+        self.match_count_label.hide()
+        info_pane_layout.addWidget(self.match_count_label)
+
+        self.query = None
+        self.query_text = None
+        self.query_error_label = QLabel(self) # Shows why the query doesn't parse instead of silently matching nothing
+        self.query_error_label.setStyleSheet("color: #FF6B6B; padding: 0 5px;")
+        self.query_error_label.setWordWrap(True)
+        self.query_error_label.hide()
+        info_pane_layout.addWidget(self.query_error_label)
+
+        self.term_count_label = QLabel(self) # Occurrences of each term in the shown image's info
+        self.term_count_label.setStyleSheet("color: #AAAAAA; padding: 0 5px;")
+        self.term_count_label.setWordWrap(True)
+        self.term_count_label.hide()
+        info_pane_layout.addWidget(self.term_count_label)
+
+        self.highlight_query = None
+        self.highlight_terms = []
+        self.highlight_pattern = None
+        self.highlight_format = QTextCharFormat()
+        self.highlight_format.setBackground(QColor("#FFC107"))
+        self.highlight_format.setForeground(QColor("black"))
+        self.highlight_timer = QTimer(self) # Debounces typing; a new image is highlighted immediately
+        self.highlight_timer.setSingleShot(True)
+        self.highlight_timer.setInterval(80)
+        self.highlight_timer.timeout.connect(self.highlight_info_text)
+
+        self.match_refresh_timer = QTimer(self)
+        self.match_refresh_timer.setSingleShot(True)
+        self.match_refresh_timer.setInterval(200)
+        self.match_refresh_timer.timeout.connect(self.refresh_matches)
+
         self.info_text = QTextEdit()
         self.info_text.setReadOnly(True)
         self.info_text.setStyleSheet("background-color: #1E1E1E; color: #D4D4D4; border: 1px solid #333; border-radius: 5px; padding: 5px; font-family: 'Courier New';")
@@ -255,7 +2355,26 @@ class SlideshowWidget(QWidget):
         self.image_info_splitter.addWidget(self.info_pane_widget)
         
         self.image_info_splitter.setSizes([700, 300])
-        self.main_content_splitter.setSizes([200, 800])
+        # --- Thumbnail Grid (Right Side) ---
+        self.thumbnail_model = ThumbnailModel(self, os.path.join(os.path.dirname(self.CONFIG_FILE), "thumbnails"))
+        self.thumbnail_view = QListView(self)
+        self.thumbnail_view.setModel(self.thumbnail_model)
+        self.thumbnail_view.setViewMode(QListView.ViewMode.IconMode)
+        self.thumbnail_view.setResizeMode(QListView.ResizeMode.Adjust)
+        self.thumbnail_view.setMovement(QListView.Movement.Static)
+        self.thumbnail_view.setUniformItemSizes(True) # Lets the view lay out millions of rows without querying each one
+        self.thumbnail_view.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        self.thumbnail_view.setGridSize(QSize(THUMBNAIL_SIZE + 12, THUMBNAIL_SIZE + 12))
+        self.thumbnail_view.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.thumbnail_view.clicked.connect(self.on_thumbnail_clicked)
+        self.thumbnail_view.setStyleSheet(
+            "QListView { background-color: #282828; color: white; border-radius: 5px; }"
+            "QListView::item:selected { background-color: #55aaff; }"
+        )
+        self.thumbnail_view.hide()
+        self.main_content_splitter.addWidget(self.thumbnail_view)
+
+        self.main_content_splitter.setSizes([200, 800, 360])
 
         bottom_layout = QHBoxLayout()
         self.delete_button = self.create_button("🗑", self.delete_current_image, "Delete (Del)")
@@ -264,12 +2383,17 @@ class SlideshowWidget(QWidget):
         self.next_button = self.create_button("⏭", lambda: self.show_next_image(manual=True), "Next (Right Arrow)")
         self.counter_label = QLabel("0 / 0", self)
         self.counter_label.setStyleSheet("color: white; padding: 0 10px;")
+        self.operations_label = QLabel(self)
+        self.operations_label.setStyleSheet("color: #AAAAAA; padding: 0 10px;")
+        self.operations_label.setToolTip("Pending / failed file operations")
+        self.operations_label.hide()
         bottom_layout.addStretch()
         bottom_layout.addWidget(self.prev_button)
         bottom_layout.addWidget(self.pause_button)
         bottom_layout.addWidget(self.next_button)
         bottom_layout.addWidget(self.counter_label)
         bottom_layout.addWidget(self.delete_button)
+        bottom_layout.addWidget(self.operations_label)
         bottom_layout.addStretch()
         container_layout.addLayout(bottom_layout)
 
@@ -278,6 +2402,18 @@ class SlideshowWidget(QWidget):
         self.feedback_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.feedback_label.setParent(self)
         self.feedback_label.hide()
+        # One restartable timer, so rapid updates (e.g. search progress) don't get hidden by an older message's timeout
+        self.feedback_timer = QTimer(self)
+        self.feedback_timer.setSingleShot(True)
+        self.feedback_timer.timeout.connect(self.feedback_label.hide)
+
+        self.timing_hud = QLabel(self)
+        self.timing_hud.setStyleSheet("color: white; font-family: 'Courier New'; background-color: rgba(0,0,0,0.7); border-radius: 5px; padding: 8px;")
+        self.timing_hud.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.timing_hud.hide()
+        self.timing_hud_timer = QTimer(self)
+        self.timing_hud_timer.setInterval(500)
+        self.timing_hud_timer.timeout.connect(self.update_timing_hud)
         
         self.size_grip = QSizeGrip(self)
 
@@ -312,19 +2448,33 @@ class SlideshowWidget(QWidget):
                 self.current_sort_order = settings.get('sort_order', "random")
                 self.slideshow_interval = settings.get('interval', 5000)
                 self.confirm_delete = settings.get('confirm_delete', True)
+                self.favorites_transfer_mode = settings.get('favorites_transfer', 'auto')
+                self.likes_transfer_mode = settings.get('likes_transfer', 'auto')
                 self.skip_non_matching = settings.get('skip_non_matching', False)
+                self.finish_animations = settings.get('finish_animations', False)
+                self.param_filter = settings.get('param_filter', {})
+                walk = settings.get('random_walk') or {}
+                self.walk_folder, self.walk_seed, self.walk_step = walk.get('folder'), walk.get('seed', 0), walk.get('step', 0)
+                self.walk_start = walk.get('start', 0)
+                self.recursive = settings.get('recursive', False)
                 self.info_panel_visible = settings.get('info_panel_visible', False)
                 self.current_sort_direction = settings.get('sort_direction', "asc") # Load sort direction
+                self.prefetch_ahead = settings.get('prefetch_ahead', 3)
+                self.prefetch_behind = settings.get('prefetch_behind', 1)
+                self.cache_budget_mb = settings.get('cache_budget_mb', 512)
+                self.image_cache.set_budget(self.cache_budget_mb * 1024 * 1024)
 
-                if self.current_sort_order == "time": self.radio_time.setChecked(True)
-                elif self.current_sort_order == "alpha": self.radio_alpha.setChecked(True)
-                else: self.radio_random.setChecked(True)
+                self.sort_order_buttons.get(self.current_sort_order, self.radio_random).setChecked(True)
 
                 if self.current_sort_direction == "desc": self.radio_desc.setChecked(True) # Set direction radio button
                 else: self.radio_asc.setChecked(True)
 
                 if self.info_panel_visible:
                     self.info_pane_widget.show()
+                self.thumbnails_visible = settings.get('thumbnails_visible', False)
+                if self.thumbnails_visible:
+                    self.thumbnail_view.show()
+                self.set_timing_hud_visible(settings.get('timing_hud_visible', False))
 
         except (json.JSONDecodeError, KeyError): self.clear_settings()
         finally: self.update_button_states()
@@ -333,8 +2483,13 @@ class SlideshowWidget(QWidget):
         settings = {
             'source': self.source_folder, 'favorites': self.favorites_folder, 'likes': self.likes_folder, 
             'sort_order': self.current_sort_order, 'interval': self.slideshow_interval, 
-            'confirm_delete': self.confirm_delete, 'skip_non_matching': self.skip_non_matching,
-            'info_panel_visible': self.info_panel_visible, 'sort_direction': self.current_sort_direction # Save sort direction
+            'confirm_delete': self.confirm_delete, 'favorites_transfer': self.favorites_transfer_mode, 'likes_transfer': self.likes_transfer_mode,
+            'skip_non_matching': self.skip_non_matching, 'finish_animations': self.finish_animations, 'param_filter': self.param_filter, 'recursive': self.recursive,
+            'info_panel_visible': self.info_panel_visible, 'sort_direction': self.current_sort_direction, # Save sort direction
+            'prefetch_ahead': self.prefetch_ahead, 'prefetch_behind': self.prefetch_behind,
+            'cache_budget_mb': self.cache_budget_mb, 'thumbnails_visible': self.thumbnails_visible,
+            'timing_hud_visible': self.timing_hud_visible,
+            'random_walk': {'folder': self.walk_folder, 'seed': self.walk_seed, 'step': self.walk_step, 'start': self.walk_start}
         }
         with open(self.CONFIG_FILE, 'w') as f: json.dump(settings, f, indent=4)
 
@@ -349,8 +2504,12 @@ class SlideshowWidget(QWidget):
         menu.addAction(QAction("Change Source Folder", self, triggered=lambda: self.prompt_for_folder('source')))
         menu.addAction(QAction("Change Favorites Folder", self, triggered=lambda: self.prompt_for_folder('favorites')))
         menu.addAction(QAction("Change Likes Folder", self, triggered=lambda: self.prompt_for_folder('likes')))
+        self.add_transfer_mode_menu(menu, "Favorites", 'favorites')
+        self.add_transfer_mode_menu(menu, "Likes", 'likes')
         menu.addSeparator()
         menu.addAction(QAction(f"Set Interval ({self.slideshow_interval/1000:.1f}s)...", self, triggered=self.set_interval))
+        menu.addAction(QAction(f"Set Prefetch Range ({self.prefetch_ahead} next / {self.prefetch_behind} previous)...", self, triggered=self.set_prefetch_range))
+        menu.addAction(QAction(f"Set Image Cache Size ({self.cache_budget_mb} MB)...", self, triggered=self.set_cache_budget))
         
         confirm_action = QAction("Confirm Before Deleting", self, checkable=True)
         confirm_action.setChecked(self.confirm_delete)
@@ -361,19 +2520,79 @@ class SlideshowWidget(QWidget):
         skip_action.setChecked(self.skip_non_matching)
         skip_action.triggered.connect(self.toggle_skip_non_matching)
         menu.addAction(skip_action)
+
+        animation_action = QAction("Finish Animations Before Advancing", self, checkable=True)
+        animation_action.setChecked(self.finish_animations)
+        animation_action.triggered.connect(self.toggle_finish_animations)
+        menu.addAction(animation_action)
+
+        recursive_action = QAction("Include Subfolders", self, checkable=True)
+        recursive_action.setChecked(self.recursive)
+        recursive_action.triggered.connect(self.toggle_recursive)
+        menu.addAction(recursive_action)
+
+        filter_menu = menu.addMenu("Filter by Parameters" + (f" ({describe_param_filter(self.param_filter)})" if self.param_filter else ""))
+        filter_menu.addAction(QAction("Model...", self, triggered=self.set_model_filter))
+        filter_menu.addAction(QAction("Seed Range...", self, triggered=self.set_seed_filter))
+        clear_filter_action = QAction("Clear Filter", self, triggered=lambda: self.set_param_filter({}))
+        clear_filter_action.setEnabled(bool(self.param_filter))
+        filter_menu.addAction(clear_filter_action)
+        menu.addAction(QAction("Review Near-Duplicates...", self, triggered=self.find_duplicates))
+        menu.addSeparator()
+        hud_action = QAction("Show Timing Overlay (H)", self, checkable=True)
+        hud_action.setChecked(self.timing_hud_visible)
+        hud_action.triggered.connect(self.toggle_timing_hud)
+        menu.addAction(hud_action)
+        menu.addAction(QAction("Export Timing Trace...", self, triggered=self.export_timing_trace))
         menu.addSeparator()
         menu.addAction(QAction("About Slidescovery", self, triggered=self.show_about_dialog))
 
         menu.exec(self.title_bar.settings_button.mapToGlobal(QPoint(0, self.title_bar.settings_button.height())))
 
+    def add_transfer_mode_menu(self, menu, name, folder_type):
+        labels = {'auto': "Auto (cheapest available)", 'reflink': "Reflink (copy-on-write clone)", 'hardlink': "Hardlink",
+                  'copy': "Copy", 'move': "Move"}
+        submenu = menu.addMenu(f"{name} Transfer Mode")
+        group = QActionGroup(submenu)
+        current_mode = getattr(self, f"{folder_type}_transfer_mode")
+        for mode in TRANSFER_MODES:
+            action = QAction(labels[mode], submenu, checkable=True)
+            action.setChecked(mode == current_mode)
+            action.triggered.connect(lambda checked, m=mode: self.set_transfer_mode(folder_type, name, m))
+            group.addAction(action)
+            submenu.addAction(action)
+
+    def set_transfer_mode(self, folder_type, name, mode):
+        setattr(self, f"{folder_type}_transfer_mode", mode)
+        self.save_settings()
+        self.show_feedback(f"{name} transfer mode: {mode}")
+
     def set_interval(self):
         new_interval, ok = QInputDialog.getDouble(self, "Set Interval", "Enter interval in seconds (0.5-60):", self.slideshow_interval / 1000, 0.5, 60, 1)
         if ok:
             self.slideshow_interval = int(new_interval * 1000)
             self.save_settings()
-            if not self.is_paused: self.timer.start(self.slideshow_interval)
+            if not self.is_paused: self.timer.start(self.slide_interval())
             self.show_feedback(f"Interval set to {new_interval}s")
 
+    def set_prefetch_range(self):
+        ahead, ok = QInputDialog.getInt(self, "Set Prefetch Range", "Number of upcoming images to preload (0-20):", self.prefetch_ahead, 0, 20)
+        if not ok: return
+        behind, ok = QInputDialog.getInt(self, "Set Prefetch Range", "Number of previous images to keep loaded (0-20):", self.prefetch_behind, 0, 20)
+        if not ok: return
+        self.prefetch_ahead, self.prefetch_behind = ahead, behind
+        self.save_settings()
+        self.schedule_prefetch()
+        self.show_feedback(f"Prefetching {ahead} next / {behind} previous")
+
+    def set_cache_budget(self):
+        budget, ok = QInputDialog.getInt(self, "Set Image Cache Size", "Memory for decoded images in MB (64-16384):", self.cache_budget_mb, 64, 16384, 64)
+        if not ok: return
+        self.cache_budget_mb = budget
+        self.image_cache.set_budget(budget * 1024 * 1024)
+        self.save_settings()
+        self.show_feedback(f"Image cache set to {budget} MB")
+
     def toggle_confirm_delete(self, checked):
         self.confirm_delete = checked
         self.save_settings()
@@ -384,7 +2603,51 @@ class SlideshowWidget(QWidget):
         self.save_settings()
         self.show_feedback(f"Skip to match is now {'ON' if checked else 'OFF'}")
         if not checked:
-            self.is_skipping = False # Cancel any ongoing search
+            self.stop_skipping() # Cancel any ongoing search
+
+    def toggle_finish_animations(self, checked):
+        self.finish_animations = checked
+        self.save_settings()
+        if self.timer.isActive(): self.timer.start(self.slide_interval())
+        self.show_feedback(f"Finish animations {'ON' if checked else 'OFF'}")
+
+    def set_model_filter(self):
+        counts = count_models(self.image_files, self.metadata_store.sort_values(os.path.normpath(self.current_folder))) if self.image_files else []
+        if not counts: self.show_feedback("No model names found in the indexed metadata"); return
+        labels = ["(Any model)"] + [f"{model}  ({count})" for model, count in counts]
+        current = next((i + 1 for i, (model, _) in enumerate(counts) if model == self.param_filter.get('model')), 0)
+        label, ok = QInputDialog.getItem(self, "Filter by Model", "Show only images generated with:", labels, current, False)
+        if not ok: return
+        param_filter = dict(self.param_filter)
+        param_filter.pop('model', None)
+        if label != labels[0]: param_filter['model'] = counts[labels.index(label) - 1][0]
+        self.set_param_filter(param_filter)
+
+    def set_seed_filter(self):
+        low, high = self.param_filter.get('seed', ("", ""))
+        text, ok = QInputDialog.getText(self, "Filter by Seed", "Seed or range (e.g. 1000-2000); empty for any:", text=f"{low}-{high}" if low != "" else "")
+        if not ok: return
+        param_filter = dict(self.param_filter)
+        param_filter.pop('seed', None)
+        if text.strip():
+            bounds = re.fullmatch(r'\s*(\d+)\s*(?:-\s*(\d+)\s*)?', text)
+            if not bounds: self.show_feedback("Enter a seed or a range like 1000-2000"); return
+            low, high = int(bounds.group(1)), int(bounds.group(2) or bounds.group(1))
+            param_filter['seed'] = [min(low, high), max(low, high)]
+        self.set_param_filter(param_filter)
+
+    def set_param_filter(self, param_filter):
+        self.param_filter = param_filter
+        self.save_settings()
+        self.stop_skipping()
+        self.refresh_matches()
+        self.show_feedback(f"Filter: {describe_param_filter(param_filter)}" if param_filter else "Filter cleared")
+
+    def toggle_recursive(self, checked):
+        self.recursive = checked
+        self.save_settings()
+        self.show_feedback(f"Subfolders {'included' if checked else 'excluded'}")
+        if self.current_folder: self.load_images(self.current_folder)
 
     def prompt_for_folder(self, folder_type):
         title_map = {'source': "Select Image Source Folder", 'favorites': "Select Favorites Folder", 'likes': "Select Likes Folder"}
@@ -396,21 +2659,24 @@ class SlideshowWidget(QWidget):
         if folder_type == 'source': 
             self._set_tree_view_root() # Call helper to set up tree view
             self.load_images(folder_path)
-            self.apply_sorting()
-            self.current_index = 0
-            self.start_slideshow()
 
     def update_button_states(self):
         self.title_bar.fav_button.setEnabled(bool(self.favorites_folder))
         self.title_bar.like_button.setEnabled(bool(self.likes_folder))
 
+    def ensure_tree_model(self):
+        if self.file_system_model is None:
+            self.file_system_model = QFileSystemModel(self)
+            self.file_system_model.setFilter(QDir.Filter.Dirs | QDir.Filter.NoDotAndDotDot)
+            self.file_system_model.setNameFilterDisables(False)
+            self.tree_view.setModel(self.file_system_model)
+            for i in range(1, 4): self.tree_view.hideColumn(i)
+        return self.file_system_model
+
     def on_tree_view_clicked(self, index):
         selected_path = self.file_system_model.filePath(index)
         if os.path.isdir(selected_path):
             self.load_images(selected_path)
-            self.apply_sorting()
-            self.current_index = 0
-            self.start_slideshow()
             
             # Ensure the path from the source folder to the selected folder is expanded
             # and the selected folder is highlighted.
@@ -429,24 +2695,247 @@ class SlideshowWidget(QWidget):
         menu.addAction(open_action)
         menu.exec(self.tree_view.viewport().mapToGlobal(position))
 
-    def load_images(self, folder_path):
-        valid_extensions = ['.png', '.jpg', '.jpeg', '.bmp', '.gif']
+    def load_images(self, folder_path, focus_path=None, snapshot=None):
+        # Starts streaming the folder listing; sorting and the first display happen as batches arrive.
+        # With a startup snapshot of this folder its listing is shown at once and the scan only revalidates it
+        self.reset_prefetch()
+        self.stop_animation()
+        self.duplicate_scan_cancel_event.set()
+        self.duplicate_clusters = None
+        self.folder_scan_cancel_event.set()
+        self.folder_scan_cancel_event = threading.Event()
+        self.folder_scan_generation += 1
+        self.image_files, self.current_index = FileTable(), 0
+        self.dir_index = {}
+        self.dirty_directories.clear()
+        if self.file_watcher.directories(): self.file_watcher.removePaths(self.file_watcher.directories())
+        self.current_folder = folder_path
+        if os.path.normpath(folder_path) != self.walk_folder: # A new folder starts a new walk; the same one resumes
+            self.walk_folder, self.walk_seed, self.walk_step = os.path.normpath(folder_path), random.getrandbits(63), 0
+            self.walk_start = 0
+        self.current_pixmap = None
+        self.is_loading_folder = True
+        self.folder_image_shown = False
+        self.pending_focus_path = os.path.normpath(focus_path) if focus_path else None
+        self.snapshot_info, self.revalidation_entries = {}, None
+        if snapshot: self.restore_startup_snapshot(*snapshot)
+        else:
+            self.image_label.setText("Loading...")
+            self.thumbnail_model.reset()
+            self.update_counter()
+        QThreadPool.globalInstance().start(FolderScanTask(self.folder_scan_signals, self.folder_scan_generation, folder_path,
+                                                          self.folder_scan_cancel_event, self.recursive))
+
+    def on_folder_scan_batch(self, generation, entries):
+        if generation != self.folder_scan_generation: return
+        if self.revalidation_entries is not None: # Compared with the restored listing once complete
+            self.revalidation_entries.update(entries)
+            return
+        self.image_files.extend(entries) # Sorted once enumeration is complete
+        for path, _ in entries:
+            directory, name = os.path.split(path)
+            self.dir_index.setdefault(directory, set()).add(self.image_files.intern_name(name))
+        self.thumbnail_model.reset()
+        # A fresh random walk can start on any image that has arrived; a resumed one waits for the full listing
+        if self.current_sort_order == "random" and self.walk_step == 0 and not self.folder_image_shown and not self.pending_focus_path:
+            self.folder_image_shown = True
+            self.current_index = random.randrange(len(self.image_files))
+            self.start_slideshow()
+        else:
+            self.update_counter()
+
+    def on_folder_scan_finished(self, generation, directories):
+        if generation != self.folder_scan_generation: return
+        self.is_loading_folder = False
+        self.file_watcher.addPaths(directories)
+        if self.revalidation_entries is not None:
+            self.reconcile_startup_snapshot(directories)
+            self.mark_startup("listing complete")
+            return
+        for directory in directories: self.dir_index.setdefault(directory, set())
+        if not self.image_files:
+            self.image_label.setText("No images found in source folder.")
+        else:
+            shown_path = self.image_files[self.current_index] if self.folder_image_shown else None
+            self.apply_sorting()
+            if self.pending_focus_path:
+                self.current_index = self.image_files.position(self.pending_focus_path, 0)
+                if self.current_sort_order == "random": self.anchor_walk()
+                self.display_current_image()
+            elif shown_path:
+                self.current_index = self.image_files.index(shown_path) # Keep the image on screen; only its index moved
+                if self.current_sort_order == "random": self.anchor_walk() # The fresh walk picked it before the listing was complete
+                self.update_counter()
+            else:
+                if self.current_sort_order == "random": self.walk_to(self.walk_step)
+                else: self.current_index = 0
+                self.start_slideshow()
+            self.folder_image_shown = True
+        self.pending_focus_path = None
+        self.start_indexing()
+        self.update_counter()
+        self.schedule_deferred_startup() # In case there was no image to show
+        self.mark_startup("listing complete")
+
+    def read_startup_snapshot(self, folder_path):
+        # (state, FileTable) of the snapshot if it was taken of folder_path with the current listing options, else None
         try:
-            self.image_files = [os.path.normpath(os.path.join(folder_path, f)) for f in os.listdir(folder_path) if os.path.splitext(f)[1].lower() in valid_extensions]
-        except FileNotFoundError: 
-            self.show_feedback(f"Source folder not found.", 5000)
-            self.clear_settings()
+            with open(self.snapshot_path, 'rb') as f: data = f.read()
+            header_end = data.index(b'\n')
+            state = json.loads(data[:header_end])
+            if state.get('version') != self.SNAPSHOT_VERSION or state['folder'] != os.path.normpath(folder_path) \
+                    or state['recursive'] != self.recursive or state['sort_order'] != self.current_sort_order \
+                    or state['sort_direction'] != self.current_sort_direction:
+                return None
+            table = FileTable.from_bytes(data[header_end + 1:])
+        except (OSError, ValueError, KeyError): return None
+        return (state, table) if table else None
+
+    def save_startup_snapshot(self):
+        # Listing, position and the info of the images around it, so the next start can paint before re-listing
+        if not self.image_files or not self.current_folder or (self.is_loading_folder and self.revalidation_entries is None): return
+        paths = [self.image_files[self.current_index]] + self.prefetch_targets()
+        state = {'version': self.SNAPSHOT_VERSION, 'folder': os.path.normpath(self.current_folder), 'recursive': self.recursive,
+                 'sort_order': self.current_sort_order, 'sort_direction': self.current_sort_direction,
+                 'current_index': self.current_index, 'walk_seed': self.walk_seed, 'walk_step': self.walk_step, 'walk_start': self.walk_start,
+                 'info': {path: (file_mtime(path), self.get_png_info_text(path)) for path in paths}}
+        try:
+            with open(self.snapshot_path + '.tmp', 'wb') as f:
+                f.write(json.dumps(state, ensure_ascii=False).encode('utf-8') + b'\n' + self.image_files.to_bytes())
+            os.replace(self.snapshot_path + '.tmp', self.snapshot_path)
+        except OSError: pass # Only an optimization; the next start lists the folder as usual
+
+    def restore_startup_snapshot(self, state, table):
+        self.image_files, self.dir_index = table, table.directory_names()
+        self.current_index = min(max(0, state['current_index']), len(table) - 1)
+        self.walk_seed, self.walk_step, self.walk_start = state['walk_seed'], state['walk_step'], state.get('walk_start', 0)
+        self.walk_permutation_cache = None
+        self.snapshot_info = state.get('info') or {}
+        self.revalidation_entries = {}
+        self.folder_image_shown = True
+        self.thumbnail_model.reset()
+        self.start_slideshow()
+
+    def reconcile_startup_snapshot(self, directories):
+        # Replaces the snapshot's rows with the fresh listing in one pass and one sort, keeping the image on screen
+        listed, self.revalidation_entries = self.revalidation_entries, None
+        self.snapshot_info = {}
+        shown_path = self.image_files[self.current_index] if self.image_files else None
+        changed = [path for path, record in self.image_files.records() if listed.get(path) != record] # Gone or re-stat'ed
+        if changed or len(listed) != len(self.image_files):
+            for path in changed:
+                self.thumbnail_model.forget(path)
+                self.image_cache.invalidate(path)
+            self.image_files = FileTable()
+            self.image_files.extend(listed.items())
+            self.dir_index = self.image_files.directory_names()
+            self.apply_sorting()
+            if not self.image_files:
+                self.thumbnail_model.reset()
+                self.image_label.setText("No images found in source folder.")
+            elif shown_path in self.image_files: self.current_index = self.image_files.index(shown_path)
+            else: # The image on screen is gone
+                self.advance_past_removed_image()
+                self.display_current_image()
+        for directory in set(self.dir_index).difference(directories): del self.dir_index[directory]
+        for directory in directories: self.dir_index.setdefault(directory, set())
+        self.start_indexing()
+        self.update_counter()
+
+    def on_directory_changed(self, directory):
+        self.dirty_directories.add(os.path.normpath(directory))
+        self.watch_timer.start()
+
+    def rescan_dirty_directories(self):
+        if self.is_loading_folder:
+            self.watch_timer.start() # Let the initial listing finish first
             return
-        if not self.image_files: self.image_label.setText("No images found in source folder.")
+        for directory in self.dirty_directories:
+            QThreadPool.globalInstance().start(DirectoryListTask(self.folder_scan_signals, self.folder_scan_generation, directory))
+        self.dirty_directories.clear()
+
+    def on_directory_listed(self, generation, directory, images, subdirectories, exists):
+        if generation != self.folder_scan_generation: return
+        removed_directories = [d for d in self.dir_index if d == directory or d.startswith(directory + os.sep)] if not exists else \
+                              [d for d in self.dir_index if os.path.dirname(d) == directory and d not in subdirectories]
+        removed = set()
+        for removed_directory in removed_directories:
+            removed.update(os.path.join(removed_directory, name) for name in self.dir_index.pop(removed_directory))
+            self.file_watcher.removePath(removed_directory)
+        added = []
+        if exists:
+            listed = {os.path.basename(path) for path, _ in images}
+            known = self.dir_index.setdefault(directory, set())
+            removed.update(os.path.join(directory, name) for name in known - listed)
+            added = [(path, record) for path, record in images if os.path.basename(path) not in known]
+            if self.recursive:
+                for subdirectory in subdirectories:
+                    if subdirectory in self.dir_index: continue
+                    # A new subfolder: watch it and list its contents like any other change
+                    self.dir_index[subdirectory] = set()
+                    self.file_watcher.addPath(subdirectory)
+                    self.on_directory_changed(subdirectory)
+        if removed or added: self.apply_listing_changes(removed, added)
+
+    def apply_listing_changes(self, removed, added):
+        # Applies files that appeared or vanished on disk without re-listing or re-sorting everything
+        was_empty = not self.image_files
+        current_removed = False
+        for index in sorted((index for index in map(self.image_files.position, removed) if index is not None), reverse=True):
+            self.remove_image_at(index)
+            if index < self.current_index: self.current_index -= 1
+            elif index == self.current_index: current_removed = True
+        for path, record in added:
+            index = self.sorted_insert_position(path, record)
+            self.thumbnail_model.beginInsertRows(QModelIndex(), index, index)
+            self.image_files.insert(index, path, record)
+            directory, name = os.path.split(path)
+            self.dir_index.setdefault(directory, set()).add(self.image_files.intern_name(name))
+            self.thumbnail_model.endInsertRows()
+            self.walk_domain_stale = self.walk_permutation_cache is not None # Joins the walk with its next round
+            if len(self.image_files) > 1 and index <= self.current_index: self.current_index += 1
+        png_added = [path for path, _ in added if path.lower().endswith('.png')]
+        if png_added and self.metadata_store.fts_available:
+            QThreadPool.globalInstance().start(MetadataIndexTask(self.watch_index_signals, self.metadata_store, 0, png_added, self.index_cancel_event))
+        self.refresh_matches()
+        if not self.image_files:
+            self.current_index = 0
+            self.image_label.setText("No images found in source folder.")
+        elif was_empty:
+            self.current_index = 0
+            self.start_slideshow()
+        elif current_removed:
+            self.advance_past_removed_image()
+            self.display_current_image()
         self.update_counter()
 
+    def sorted_insert_position(self, path, record):
+        # Binary search with the active sort key; equal keys go after existing entries
+        if self.current_sort_order == "random": return bisect_right(self.image_files, path)
+        key = self.sort_key_function()
+        path_key, descending = key(path, record), self.current_sort_direction == "desc"
+        low, high = 0, len(self.image_files)
+        while low < high:
+            middle = (low + high) // 2
+            middle_key = key(self.image_files[middle], self.image_files.record(middle))
+            if (path_key > middle_key) if descending else (path_key < middle_key): high = middle
+            else: low = middle + 1
+        return low
+
+    def on_folder_scan_failed(self, generation, message):
+        if generation != self.folder_scan_generation: return
+        self.is_loading_folder = False
+        self.image_label.setText("")
+        self.show_feedback(f"Source folder not found.", 5000)
+        self.clear_settings()
+        self.schedule_deferred_startup()
+
     def on_sort_order_changed(self, button, checked):
         if checked:
-            if button == self.radio_random: self.current_sort_order = "random"
-            elif button == self.radio_time: self.current_sort_order = "time"
-            elif button == self.radio_alpha: self.current_sort_order = "alpha"
+            self.current_sort_order = next(order for order, radio in self.sort_order_buttons.items() if radio == button)
             self.apply_sorting()
-            self.current_index = 0
+            if self.current_sort_order == "random": self.walk_to(self.walk_step)
+            else: self.current_index = 0
             self.display_current_image()
             self.save_settings()
 
@@ -454,164 +2943,492 @@ class SlideshowWidget(QWidget):
         if checked:
             if button == self.radio_asc: self.current_sort_direction = "asc"
             elif button == self.radio_desc: self.current_sort_direction = "desc"
-            self.apply_sorting()
+            if self.current_sort_order == "random": self.save_settings(); return # The walk has no direction
+            # The list is already ordered by the current key, so a flip is just a reversal
+            self.reset_prefetch()
+            self.image_files.reverse()
+            self.thumbnail_model.reset()
+            self.refresh_match_positions()
             self.current_index = 0
             self.display_current_image()
             self.save_settings()
 
     def apply_sorting(self):
+        self.reset_prefetch()
+        self.walk_permutation_cache = None # The walk is rebuilt over the new listing
+        self.info_sort_values = None # Re-read from the store by sort_key_function
         if not self.image_files: return
-        if self.current_sort_order == "random": random.shuffle(self.image_files)
-        elif self.current_sort_order == "time": 
-            self.image_files.sort(key=os.path.getctime, reverse=(self.current_sort_direction == "desc"))
-        elif self.current_sort_order == "alpha": 
-            self.image_files.sort(key=lambda x: os.path.basename(x).lower(), reverse=(self.current_sort_direction == "desc"))
+        if self.current_sort_order == "random": self.image_files.sort() # Path order, so a saved walk resumes on the same images
+        else:
+            self.image_files.sort(key=self.sort_key_function(), reverse=(self.current_sort_direction == "desc"))
+        self.thumbnail_model.reset()
+        self.refresh_match_positions()
+
+    def get_file_stats(self, path):
+        # The record captured during enumeration; a path outside the listing is stat'ed directly
+        index = self.image_files.position(path)
+        if index is not None: return self.image_files.record(index)
+        try: return stat_sort_record(os.stat(path))
+        except OSError: return (0, 0, 0)
+
+    def sort_key_function(self):
+        # Info orders read only what the index workers stored (one query per sort); a file not indexed yet, or changed
+        # since, sorts as if it had no metadata until indexing finishes and the listing is re-sorted
+        if self.current_sort_order in INFO_SORT_ORDERS and self.info_sort_values is None:
+            self.info_sort_values = self.metadata_store.sort_values(os.path.normpath(self.current_folder))
+        values = self.info_sort_values or {}
+        def get_sort_values(path, record):
+            stored = values.get(path)
+            return stored[1:] if stored and stored[0] == record[1] else None
+        return make_sort_key(self.current_sort_order, get_sort_values)
+
+    def remove_image_at(self, index):
+        # Single place that drops an entry from image_files and keeps derived state in step
+        self.thumbnail_model.beginRemoveRows(QModelIndex(), index, index)
+        path = self.image_files.pop(index)
+        self.thumbnail_model.endRemoveRows()
+        self.thumbnail_model.forget(path)
+        directory, name = os.path.split(path)
+        self.dir_index.get(directory, set()).discard(name)
+        self.image_cache.invalidate(path)
+        if self.match_paths is not None: self.match_paths.discard(path)
+        if self.match_positions is not None:
+            self.match_positions = [p - 1 if p > index else p for p in self.match_positions if p != index]
+        return path
+
+    def remove_current_image(self):
+        # Drops the image on screen (trashed, moved away or unreadable) and moves on; False when nothing is left
+        self.remove_image_at(self.current_index)
+        if not self.image_files: return False
+        self.advance_past_removed_image()
+        return True
+
+    def advance_past_removed_image(self):
+        # After the image on screen left the listing: on along the walk in random order, else to the file now in its place
+        if self.current_sort_order == "random": self.walk_to(self.walk_step + 1)
+        elif self.current_index >= len(self.image_files): self.current_index = 0
+
+    def start_indexing(self):
+        self.index_cancel_event.set()
+        self.index_cancel_event = threading.Event()
+        self.index_generation += 1
+        if not self.metadata_store.fts_available: return
+        png_files = [path for path in self.image_files if path.lower().endswith('.png')]
+        self.index_progress = (0, len(png_files))
+        QThreadPool.globalInstance().start(MetadataIndexTask(self.index_signals, self.metadata_store, self.index_generation, png_files, self.index_cancel_event))
+        self.refresh_matches()
+
+    def is_index_ready(self):
+        done, total = self.index_progress
+        return self.metadata_store.fts_available and done == total
+
+    def on_index_progress(self, generation, done, total):
+        if generation != self.index_generation: return
+        self.index_progress = (done, total)
+        if done < total:
+            self.update_match_label() # Meanwhile only the progress note changes
+            return
+        if self.current_sort_order in INFO_SORT_ORDERS and self.image_files: # Now sorted by every file's stored metadata
+            shown_path = self.image_files[self.current_index]
+            self.apply_sorting()
+            self.current_index = self.image_files.index(shown_path)
+            self.update_counter()
+        self.refresh_matches() # The full query runs once, when the index is complete
+
+    def current_query(self):
+        # The search bar's compiled query (None when blank or invalid); recompiled only when the text changes
+        search_text = self.info_search_bar.text()
+        if search_text != self.query_text:
+            self.query_text = search_text
+            try:
+                self.query, error = SearchQuery.parse(search_text), None
+            except QuerySyntaxError as e:
+                self.query, error = None, str(e)
+            self.query_error_label.setText(error or "")
+            self.query_error_label.setVisible(bool(error))
+            self.info_search_bar.setProperty("invalid", bool(error))
+            self.info_search_bar.style().polish(self.info_search_bar)
+        return self.query
+
+    def refresh_matches(self):
+        # The SQL search runs on the worker pool (on_match_search_finished); clearing the query takes effect at once
+        self.match_search_generation += 1
+        query = self.current_query()
+        if not (query or self.param_filter) or not self.metadata_store.fts_available:
+            self.match_search_pending = False
+            self.match_paths = self.match_positions = self.match_walk_steps = None
+            self.refresh_match_positions()
+            return
+        self.match_search_pending = True
+        QThreadPool.globalInstance().start(MatchSearchTask(self.match_search_signals, self.metadata_store, self.match_search_generation,
+                                                           query, self.image_files.copy() if query and query.matches("") else (), self.param_filter))
+
+    def on_match_search_finished(self, generation, paths):
+        if generation != self.match_search_generation: return
+        self.match_search_pending = False
+        self.match_paths, self.match_walk_steps = paths, None
+        self.refresh_match_positions()
+
+    def is_filtering(self):
+        # Navigation only visits matches while a parameter filter is set, or with "skip to matching" and a search
+        return bool(self.param_filter) or (self.skip_non_matching and self.current_query() is not None)
+
+    def refresh_match_positions(self):
+        if self.match_paths is not None:
+            self.match_positions = sorted(index for index in map(self.image_files.position, self.match_paths) if index is not None)
+        self.update_match_label()
+
+    def update_match_label(self):
+        if self.match_positions is None:
+            self.match_count_label.hide()
+            return
+        total = len(self.match_positions)
+        k = bisect_left(self.match_positions, self.current_index)
+        if k < total and self.match_positions[k] == self.current_index: text = f"{k + 1} of {total} matches"
+        else: text = f"{total} matches"
+        if not self.is_index_ready():
+            done, files = self.index_progress
+            text += f" (indexing {done}/{files}...)"
+        self.match_count_label.setText(text)
+        self.match_count_label.show()
+
+    def jump_to_match(self, direction):
+        # O(log n) jump through the precomputed match set; False when the index cannot answer yet
+        if self.match_positions is None or self.match_search_pending or not self.is_index_ready(): return False
+        positions = self.match_positions
+        if self.current_sort_order == "random" and positions and positions != [self.current_index]:
+            found = self.next_match_step(direction) # Along the walk, so skipping keeps the random order
+            if found is None:
+                self.show_feedback("No more matches found.", position='bottom')
+                return True
+            self.walk_step, self.current_index = found
+            self.display_current_image()
+            self.show_feedback(f"Match ({len(positions)} total)", position='bottom')
+            return True
+        if direction > 0: k = bisect_right(positions, self.current_index) % max(len(positions), 1)
+        else: k = bisect_left(positions, self.current_index) - 1
+        if not positions or positions[k] == self.current_index:
+            self.show_feedback("No more matches found.", position='bottom')
+            return True
+        self.current_index = positions[k]
+        self.display_current_image()
+        self.show_feedback(f"Match {k % len(positions) + 1} of {len(positions)}", position='bottom')
+        return True
 
     def start_slideshow(self):
         self.display_current_image()
-        if not self.is_paused: self.timer.start(self.slideshow_interval)
+        if not self.is_paused: self.timer.start(self.slide_interval())
+
+    def walk_permutation(self):
+        # The walk permutes a fixed domain of paths, the listing when it was built, so removals never reshuffle it:
+        # steps landing on a path no longer listed are stepped over. Files added meanwhile join at the next round
+        # (walk_to); the domain is also rebuilt once most of it is gone
+        permutation = self.walk_permutation_cache
+        if permutation is None or permutation.seed != self.walk_seed or len(self.image_files) * 2 < len(self.walk_domain):
+            self.walk_domain = self.image_files.copy()
+            permutation = self.walk_permutation_cache = RandomPermutation(max(1, len(self.walk_domain)), self.walk_seed)
+            self.walk_domain_stale, self.match_walk_steps = False, None
+        return permutation
+
+    def anchor_walk(self):
+        # Starts the walk's round on the image on screen, e.g. one a fresh walk showed before the listing was complete
+        self.walk_permutation_cache = None # Over the whole listing, which now includes the image on screen
+        permutation = self.walk_permutation()
+        self.walk_step = self.walk_start = permutation.index(self.walk_domain.index(self.image_files[self.current_index]))
+
+    def walk(self, step, direction=1):
+        # (step, index in image_files) for every step of the random walk from step on, backwards for direction -1
+        if not self.image_files: return
+        permutation, domain, misses = self.walk_permutation(), self.walk_domain, 0
+        while misses < permutation.size:
+            index = self.image_files.position(domain[permutation[step]])
+            if index is None: misses += 1
+            else:
+                yield step, index
+                misses = 0
+            step += direction
+
+    def walk_to(self, step, direction=1):
+        # Moves to the first listed image of the walk from step on. Entering a new round first takes in the files
+        # added during the last one; the step is then re-based to the first (or, backwards, last) step of that round
+        if self.image_files:
+            size = self.walk_permutation().size
+            round_index = (step - self.walk_start) // size
+            if self.walk_domain_stale and round_index != (self.walk_step - self.walk_start) // size:
+                self.walk_permutation_cache = None
+                backwards = direction < 0
+                step = self.walk_start + (round_index + backwards) * self.walk_permutation().size - backwards
+        self.walk_step, self.current_index = next(self.walk(step, direction), (step, 0))
+
+    def walk_position(self):
+        # 1-based position of the image on screen in the current round of the walk
+        size = len(self.walk_domain) if self.walk_permutation_cache is not None else len(self.image_files)
+        return min((self.walk_step - self.walk_start) % size + 1, len(self.image_files))
+
+    def next_match_step(self, direction):
+        # (step, index) of the next match along the walk, or None. Dense matches turn up within a few steps; otherwise
+        # the walk steps of all matches (inverse permutation, once per match set) are searched with a bisect
+        for _, (step, index) in zip(range(64), self.walk(self.walk_step + direction, direction)):
+            if index != self.current_index and self.image_files[index] in self.match_paths: return step, index
+        permutation = self.walk_permutation()
+        if self.match_walk_steps is None or self.match_walk_steps[0] is not permutation:
+            rows = (self.walk_domain.position(path) for path in self.match_paths)
+            self.match_walk_steps = (permutation, sorted(permutation.index(row) for row in rows if row is not None))
+        steps = self.match_walk_steps[1]
+        cycle_start, offset = self.walk_step - self.walk_step % permutation.size, self.walk_step % permutation.size
+        k = bisect_right(steps, offset) if direction > 0 else bisect_left(steps, offset) - 1
+        for i in range(len(steps)):
+            cycle, j = divmod(k + i * direction, len(steps))
+            path = self.walk_domain[permutation[steps[j]]]
+            index = self.image_files.position(path)
+            if index is not None and index != self.current_index and path in self.match_paths:
+                return cycle_start + cycle * permutation.size + steps[j], index
+        return None
 
     def show_random_image(self):
         if not self.image_files: return
-        if len(self.image_files) > 1:
-            # Select a random index different from the current one, if possible
-            new_index = random.randrange(len(self.image_files))
-            while new_index == self.current_index and len(self.image_files) > 1:
-                new_index = random.randrange(len(self.image_files))
-            self.current_index = new_index
-        else:
-            self.current_index = 0 # Only one image, just show it
-
+        self.walk_to(self.walk_step + 1) # Non-repeating until every image has been visited once
         self.display_current_image()
-        if not self.is_paused: self.timer.start(self.slideshow_interval)
+        if not self.is_paused: self.timer.start(self.slide_interval())
 
     def display_current_image(self):
         if self.is_skipping or not self.image_files: return
         image_path = self.image_files[self.current_index]
-        self.current_pixmap = QPixmap(image_path)
-        if self.current_pixmap.isNull(): self.handle_load_error(); return
+        self.stop_animation()
+        mtime = file_mtime(image_path)
+        self.current_image_key = (image_path, mtime)
+        with self.stage_timings.measure("display"):
+            image = self.get_cached_decode(image_path, mtime)
+            if image is None:
+                target_size = self.decode_target_size()
+                with self.stage_timings.measure("decode"): image = decode_image(image_path, target_size)
+                if not image.isNull(): self.image_cache.put((image_path, mtime, decode_cache_tag(target_size)), image)
+            self.current_pixmap = QPixmap.fromImage(image)
+            if self.current_pixmap.isNull(): self.handle_load_error(); return
+            self.update_image_display()
+            self.load_png_info(image_path)
+            self.update_counter()
+            self.sync_thumbnail_selection()
+            self.schedule_prefetch()
+        self.start_animation(image_path)
+        if self.finish_animations and self.timer.isActive(): self.timer.start(self.slide_interval()) # Each slide gets its own hold time
+        if not self.deferred_startup_scheduled:
+            self.mark_startup("first image")
+            self.schedule_deferred_startup()
+
+    def start_animation(self, image_path):
+        # Animated GIF/APNG frames replace the still first frame as they are decoded
+        animation = read_animation_info(image_path) if image_path.lower().endswith(('.gif', '.png')) else None
+        if animation is None: return
+        source_size = QImageReader(image_path).size()
+        if not source_size.isValid(): return
+        decode_size = fit_decode_size(source_size, self.decode_target_size())
+        frame_bytes = decode_size.width() * decode_size.height() * 4
+        if frame_bytes > self.ANIMATION_FRAME_BYTES: decode_size = decode_size * math.sqrt(self.ANIMATION_FRAME_BYTES / frame_bytes)
+        # Pillow composites APNG frames at full size whatever the display size, so the cap applies to the source
+        if animation[0] == 'png' and source_size.width() * source_size.height() * 4 > self.ANIMATION_FRAME_BYTES: return
+        self.animation = AnimationPlayer(image_path, *animation, decode_size, self)
+        self.animation.frame.connect(self.on_animation_frame)
+        self.update_animation_state()
+
+    def stop_animation(self):
+        if self.animation is None: return
+        self.animation.stop()
+        self.animation.deleteLater()
+        self.animation = None
+
+    def update_animation_state(self):
+        # Frames are decoded only while the slideshow runs and the window can be seen
+        if self.animation: self.animation.set_paused(self.is_paused or not self.isVisible() or self.isMinimized())
+
+    def on_animation_frame(self, image):
+        if self.sender() is not self.animation: return # A frame queued before the image changed
+        self.current_pixmap = QPixmap.fromImage(image)
+        self.current_image_key = None # Frames are not worth a slot in the scaled-image cache
         self.update_image_display()
-        self.load_png_info(image_path)
-        self.update_counter()
+
+    def slide_interval(self):
+        # The slideshow interval, stretched to one loop of the current animation with finish_animations
+        if not (self.finish_animations and self.animation): return self.slideshow_interval
+        return max(self.slideshow_interval, min(int(self.animation.loop_duration * 1000), self.MAX_ANIMATION_HOLD))
+
+    def sync_thumbnail_selection(self):
+        if not self.thumbnail_view.isVisible() or not self.image_files: return
+        index = self.thumbnail_model.index(self.current_index)
+        self.thumbnail_view.setCurrentIndex(index)
+        self.thumbnail_view.scrollTo(index)
+
+    def on_thumbnail_clicked(self, index):
+        if not index.isValid() or index.row() >= len(self.image_files): return
+        self.stop_skipping()
+        self.current_index = index.row()
+        self.display_current_image()
+        if not self.is_paused: self.timer.start(self.slide_interval())
+
+    def decode_target_size(self):
+        # Decode at display size; only a maximized/fullscreen window gets full resolution
+        if self.isMaximized() or self.isFullScreen(): return None
+        return self.image_label.size()
+
+    def get_cached_decode(self, image_path, mtime):
+        # A full-resolution decode is good enough for any target, so it is accepted as a fallback
+        image = self.image_cache.get((image_path, mtime, decode_cache_tag(self.decode_target_size())))
+        if image is None: image = self.image_cache.get((image_path, mtime, None))
+        return image
+
+    def reset_prefetch(self):
+        # Invalidate everything queued for the old folder / order; late results are dropped by generation
+        self.prefetch_generation += 1
+        self.prefetch_pool.clear()
+        self.prefetch_pending.clear()
+
+    def prefetch_targets(self):
+        count = len(self.image_files)
+        if self.current_sort_order == "random": # Next / previous follow the walk
+            targets = [self.image_files[index] for _, (_, index) in zip(range(self.prefetch_ahead), self.walk(self.walk_step + 1))]
+            targets += [self.image_files[index] for _, (_, index) in zip(range(self.prefetch_behind), self.walk(self.walk_step - 1, -1))]
+        else:
+            targets = [self.image_files[(self.current_index + offset) % count] for offset in range(1, self.prefetch_ahead + 1)]
+            targets += [self.image_files[(self.current_index - offset) % count] for offset in range(1, self.prefetch_behind + 1)]
+            targets += [self.image_files[index] for _, (_, index) in zip(range(1), self.walk(self.walk_step + 1))] # Where show_random_image goes
+        return list(dict.fromkeys(targets)) # De-duplicate while keeping priority order
+
+    def schedule_prefetch(self):
+        if not self.image_files: return
+        target_size = self.decode_target_size()
+        tag = decode_cache_tag(target_size)
+        for path in self.prefetch_targets():
+            if (path, tag) in self.prefetch_pending: continue
+            # get() rather than `in` so ring members are refreshed in the LRU order
+            if self.get_cached_decode(path, file_mtime(path)) is not None: continue
+            self.prefetch_pending.add((path, tag))
+            self.prefetch_pool.start(ImageLoadTask(self.prefetch_signals, self.prefetch_generation, path, target_size))
+
+    def on_prefetch_loaded(self, generation, image_path, mtime, tag, image):
+        if generation != self.prefetch_generation: return
+        self.prefetch_pending.discard((image_path, tag))
+        if not image.isNull(): self.image_cache.put((image_path, mtime, tag), image)
 
     def update_counter(self):
-        if self.image_files: self.counter_label.setText(f"{self.current_index + 1} / {len(self.image_files)}")
-        else: self.counter_label.setText("0 / 0")
+        if not self.image_files: self.counter_label.setText("0 / 0")
+        elif self.current_sort_order == "random": self.counter_label.setText(f"{self.walk_position()} / {len(self.image_files)}")
+        else: self.counter_label.setText(f"{self.current_index + 1} / {len(self.image_files)}")
+        self.update_match_label()
 
     def load_png_info(self, image_path):
-        self.info_text.clear()
-        if image_path.lower().endswith('.png'):
-            try:
-                with Image.open(image_path) as img:
-                    if img.info:
-                        info_items = [f"{key}:\n{value}" for key, value in img.info.items()]
-                        info_text = "\n\n".join(info_items)
-                        self.info_text.setPlainText(info_text)
-            except Exception: pass
+        if not self.info_panel_visible: return # Not read for a hidden pane; toggle_info_pane fills it in
+        with self.stage_timings.measure("png_info"):
+            self.info_text.clear()
+            info_text = self.get_png_info_text(image_path)
+            if info_text: self.info_text.setPlainText(info_text)
         self.highlight_info_text()
 
     def highlight_info_text(self):
-        search_text = self.info_search_bar.text()
-        search_terms = [term for term in re.split(r'[\s　]+', search_text) if term]
-        document = self.info_text.document()
-        
-        cursor = QTextCursor(document)
-        cursor.select(QTextCursor.SelectionType.Document)
-        default_format = QTextCharFormat()
-        cursor.setCharFormat(default_format)
-
-        if not search_terms: return
-
-        highlight_format = QTextCharFormat()
-        highlight_format.setBackground(QColor("#FFC107"))
-        highlight_format.setForeground(QColor("black"))
-
-        for term in search_terms:
-            cursor = QTextCursor(document)
-            while not cursor.isNull() and not cursor.atEnd():
-                cursor = document.find(term, cursor)
-                if not cursor.isNull():
-                    cursor.mergeCharFormat(highlight_format)
-                else:
-                    break
+        with self.stage_timings.measure("highlight"):
+            query = self.current_query()
+            if query is not self.highlight_query: # Recompile only when the query changed, not on every image
+                self.highlight_query = query
+                self.highlight_terms = query.highlight_terms() if query else []
+                self.highlight_pattern = compile_highlight_pattern(self.highlight_terms)
+            if self.highlight_pattern is None:
+                self.info_text.setExtraSelections([])
+                self.term_count_label.hide()
+                return
+            spans, counts = find_highlight_spans(self.info_text.toPlainText(), self.highlight_pattern, self.highlight_terms)
+            # Extra selections overlay the document without touching its formats, so nothing needs resetting
+            selections = []
+            for start, end in spans[:self.MAX_HIGHLIGHTS]:
+                selection = QTextEdit.ExtraSelection()
+                selection.cursor = QTextCursor(self.info_text.document())
+                selection.cursor.setPosition(start)
+                selection.cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+                selection.format = self.highlight_format
+                selections.append(selection)
+            self.info_text.setExtraSelections(selections)
+            self.term_count_label.setText("   ".join(f"{term}: {count}" for term, count in counts.items()))
+            self.term_count_label.show()
 
     def handle_load_error(self):
-        self.image_files.pop(self.current_index)
-        if not self.image_files: self.close(); return
-        if self.current_index >= len(self.image_files): self.current_index = 0
+        if not self.remove_current_image(): self.close(); return
         self.display_current_image()
 
     def show_next_image(self, manual=False):
-        self.is_skipping = False # Stop any current skip
+        self.stop_skipping() # Stop any current skip
         if not self.image_files or (not manual and self.is_paused):
             return
         
         if manual and not self.is_paused:
-            self.timer.start(self.slideshow_interval)
+            self.timer.start(self.slide_interval())
 
-        if self.skip_non_matching and self.info_search_bar.text():
+        if self.is_filtering():
+            if self.jump_to_match(1): return
             self.is_skipping = True
             self.show_feedback("Searching for next match...", position='bottom')
             self.find_match(direction=1, start_index=self.current_index)
+        elif self.current_sort_order == "random":
+            self.walk_to(self.walk_step + 1)
+            self.display_current_image()
         else:
             self.current_index = (self.current_index + 1) % len(self.image_files)
             self.display_current_image()
 
     def show_previous_image(self):
-        self.is_skipping = False # Stop any current skip
+        self.stop_skipping() # Stop any current skip
         if not self.image_files:
             return
 
         if not self.is_paused:
-            self.timer.start(self.slideshow_interval)
+            self.timer.start(self.slide_interval())
 
-        if self.skip_non_matching and self.info_search_bar.text():
+        if self.is_filtering():
+            if self.jump_to_match(-1): return
             self.is_skipping = True
             self.show_feedback("Searching for previous match...", position='bottom')
             self.find_match(direction=-1, start_index=self.current_index)
+        elif self.current_sort_order == "random":
+            self.walk_to(self.walk_step - 1, -1)
+            self.display_current_image()
         else:
             self.current_index = (self.current_index - 1 + len(self.image_files)) % len(self.image_files)
             self.display_current_image()
 
     def get_png_info_text(self, image_path):
-        info_content = ""
-        if image_path.lower().endswith('.png'):
-            try:
-                with Image.open(image_path) as img:
-                    if img.info:
-                        info_items = [f"{key}:\n{value}" for key, value in img.info.items()]
-                        info_content = "\n\n".join(info_items)
-            except Exception:
-                pass
-        return info_content
+        saved = self.snapshot_info.get(image_path)
+        if saved and saved[0] == file_mtime(image_path): return saved[1] # Saved with the startup snapshot; skips the store on the first frame
+        info_text = format_png_info(self.metadata_store.get_info(image_path))
+        summary = format_generation_params(self.metadata_store.get_params(image_path))
+        return f"{summary}\n\n{info_text}" if summary else info_text
+
+    def stop_skipping(self):
+        self.is_skipping = False
+        self.scan_cancel_event.set()
 
     def find_match(self, direction, start_index):
         if not self.is_skipping:
             return
-
-        self.current_index = (self.current_index + direction + len(self.image_files)) % len(self.image_files)
-
-        if self.current_index == start_index:
-            self.is_skipping = False
+        self.scan_cancel_event.set()
+        self.scan_cancel_event = threading.Event()
+        self.scan_generation += 1
+        QThreadPool.globalInstance().start(MatchScanTask(self.scan_signals, self.metadata_store, self.scan_generation, self.image_files.copy(),
+                                                         start_index, direction, self.current_query(), self.scan_cancel_event, self.param_filter))
+
+    def on_match_scan_progress(self, generation, checked, total):
+        if generation != self.scan_generation or not self.is_skipping: return
+        self.show_feedback(f"Searching... {checked} / {total}", position='bottom')
+
+    def on_match_scan_finished(self, generation, image_path):
+        if generation != self.scan_generation or not self.is_skipping: return
+        self.is_skipping = False
+        if not image_path:
             self.show_feedback("No more matches found.", position='bottom')
             self.display_current_image()
             return
-
-        image_path = self.image_files[self.current_index]
-        info_content = self.get_png_info_text(image_path).lower()
-        search_text = self.info_search_bar.text()
-        search_terms = [term.lower() for term in re.split(r'[\s　]+', search_text) if term]
-
-        is_match = all(term in info_content for term in search_terms)
-
-        if search_terms and is_match:
-            self.is_skipping = False
-            self.show_feedback("Match found!", position='bottom')
-            self.display_current_image()
-            if not self.is_paused:
-                self.timer.start(self.slideshow_interval)
-        else:
-            QTimer.singleShot(10, lambda: self.find_match(direction, start_index))
+        # The list may have shifted (e.g. a delete) while the scan ran; re-resolve by path
+        self.current_index = self.image_files.position(image_path, self.current_index)
+        self.show_feedback("Match found!", position='bottom')
+        self.display_current_image()
+        if not self.is_paused:
+            self.timer.start(self.slide_interval())
 
     def delete_current_image(self):
         if not self.image_files: return
@@ -626,31 +3443,120 @@ class SlideshowWidget(QWidget):
             self.show_feedback(f"File not found. Removing from list.")
             self.handle_load_error()
             return
-        try:
-            send2trash.send2trash(path_to_delete)
-            self.image_files.pop(self.current_index)
-            if not self.image_files: 
+        self.file_operations.submit('trash', path_to_delete) # Queued behind any pending copy of the same file
+        if not self.remove_current_image():
+            self.image_label.setText("No more images.")
+            self.update_counter()
+            QTimer.singleShot(2000, self.close)
+            return
+        self.display_current_image()
+        self.show_feedback("Moved to Trash")
+
+    def trash_image_at(self, index):
+        # Queued behind any pending copy of the same file; the list is updated optimistically
+        self.file_operations.submit('trash', self.image_files[index])
+        self.remove_image_at(index)
+
+    def find_duplicates(self):
+        if not self.image_files: return
+        self.duplicate_scan_cancel_event.set()
+        self.duplicate_scan_cancel_event = threading.Event()
+        self.duplicate_scan_generation += 1
+        entries = [(path,) + record[1:] for path, record in self.image_files.records()] # (path, mtime, size)
+        QThreadPool.globalInstance().start(DuplicateScanTask(self.duplicate_signals, self.metadata_store, self.duplicate_scan_generation,
+                                                             entries, self.duplicate_scan_cancel_event))
+        self.show_feedback("Looking for near-duplicates...", position='bottom')
+
+    def on_duplicate_scan_progress(self, generation, done, total):
+        if generation != self.duplicate_scan_generation: return
+        self.show_feedback(f"Hashing images... {done} / {total}", position='bottom')
+
+    def on_duplicate_scan_finished(self, generation, clusters):
+        if generation != self.duplicate_scan_generation: return
+        if not clusters:
+            self.show_feedback("No near-duplicates found.", position='bottom')
+            return
+        if not self.is_paused: self.toggle_pause() # Review at the user's pace
+        self.duplicate_clusters, self.duplicate_cluster, self.duplicate_member = clusters, 0, 0
+        self.show_duplicate()
+
+    def show_duplicate(self):
+        # Displays the current member of the cluster under review, passing over clusters already resolved
+        while self.duplicate_cluster < len(self.duplicate_clusters):
+            members = [path for path in self.duplicate_clusters[self.duplicate_cluster] if path in self.image_files]
+            if len(members) > 1: break
+            self.duplicate_cluster, self.duplicate_member = self.duplicate_cluster + 1, 0
+        else:
+            self.end_duplicate_review("Near-duplicate review finished.")
+            return
+        self.duplicate_clusters[self.duplicate_cluster] = members
+        self.duplicate_member %= len(members)
+        self.current_index = self.image_files.index(members[self.duplicate_member])
+        self.display_current_image()
+        self.show_feedback(f"Near-duplicates {self.duplicate_cluster + 1}/{len(self.duplicate_clusters)}: image {self.duplicate_member + 1} of {len(members)}\n"
+                           "←/→ compare · K keep this one, trash the rest · S skip · Esc stop", 600000, position='bottom')
+
+    def step_duplicate(self, direction):
+        self.duplicate_member += direction
+        self.show_duplicate()
+
+    def skip_duplicate_cluster(self):
+        self.duplicate_cluster, self.duplicate_member = self.duplicate_cluster + 1, 0
+        self.show_duplicate()
+
+    def keep_duplicate(self):
+        # Keeps the image on screen and sends the rest of its cluster through the trash queue
+        members = self.duplicate_clusters[self.duplicate_cluster]
+        keeper = members[self.duplicate_member]
+        if keeper not in self.image_files: self.show_duplicate(); return # Deleted or moved meanwhile
+        losers = [path for path in members if path != keeper]
+        if self.confirm_delete:
+            reply = QMessageBox.question(self, 'Confirm Delete', f"Keep this image and move the other {len(losers)} to the trash?\n\n{os.path.basename(keeper)}",
+                                         QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
+            if reply == QMessageBox.StandardButton.No: return
+        for index in sorted((index for index in map(self.image_files.position, losers) if index is not None), reverse=True):
+            self.trash_image_at(index)
+        self.current_index = self.image_files.index(keeper)
+        self.skip_duplicate_cluster()
+
+    def end_duplicate_review(self, message="Near-duplicate review stopped."):
+        self.duplicate_clusters = None
+        self.show_feedback(message, position='bottom')
+
+    def copy_image(self, dest_folder, name, mode='copy'):
+        if not dest_folder: self.show_feedback(f"'{name}' folder not set"); return
+        if not self.image_files: return
+        operation = self.file_operations.submit('transfer', self.image_files[self.current_index], dest_folder, name, mode)
+        if operation.removes_source():
+            if not self.remove_current_image():
                 self.image_label.setText("No more images.")
                 self.update_counter()
-                QTimer.singleShot(2000, self.close)
                 return
-            if self.current_index >= len(self.image_files): self.current_index = 0
             self.display_current_image()
-            self.show_feedback("Moved to Trash")
-        except Exception as e: self.show_feedback(f"Error: {e}")
-
-    def copy_image(self, dest_folder, name):
-        if not dest_folder: self.show_feedback(f"'{name}' folder not set"); return
-        if not self.image_files: return
-        source_path = self.image_files[self.current_index]
-        dest_path = os.path.join(dest_folder, os.path.basename(source_path))
-        try: 
-            shutil.copy2(source_path, dest_path)
-            self.show_feedback(f"Copied to {name}!")
-        except Exception as e: self.show_feedback(f"Error: {e}")
 
-    def add_to_favorites(self): self.copy_image(self.favorites_folder, "Favorites")
-    def add_to_likes(self): self.copy_image(self.likes_folder, "Likes")
+    def on_file_operation_succeeded(self, operation):
+        if operation.kind == 'transfer':
+            verb = "Moved" if operation.strategy == 'move' else "Copied" if operation.strategy == 'copy' else "Added"
+            detail = "" if operation.strategy in ('move', 'copy') else f" ({operation.strategy})"
+            self.show_feedback(f"{verb} to {operation.label}!{detail}")
+        if operation.removes_source(): self.metadata_store.forget(operation.source_path)
+
+    def on_file_operation_failed(self, operation, message):
+        self.show_feedback(f"Error: {message}")
+        # Undo the optimistic removal if the file is still there and belongs to the loaded folder
+        if operation.removes_source() and os.path.exists(operation.source_path) and os.path.dirname(operation.source_path) in self.dir_index \
+                and operation.source_path not in self.image_files:
+            self.apply_listing_changes(set(), [(operation.source_path, self.get_file_stats(operation.source_path))])
+
+    def on_file_operation_status(self, pending, failed):
+        parts = []
+        if pending: parts.append(f"⏳ {pending}")
+        if failed: parts.append(f"⚠ {failed} failed")
+        self.operations_label.setText("  ".join(parts))
+        self.operations_label.setVisible(bool(parts))
+
+    def add_to_favorites(self): self.copy_image(self.favorites_folder, "Favorites", self.favorites_transfer_mode)
+    def add_to_likes(self): self.copy_image(self.likes_folder, "Likes", self.likes_transfer_mode)
 
     def show_feedback(self, message, duration=2000, position='center'):
         self.feedback_position = position
@@ -658,18 +3564,19 @@ class SlideshowWidget(QWidget):
         self.feedback_label.adjustSize()
         self.feedback_label.show()
         self.reposition_feedback()
-        QTimer.singleShot(duration, self.feedback_label.hide)
+        self.feedback_timer.start(duration)
 
     def toggle_pause(self):
         self.is_paused = not self.is_paused
         self.pause_button.setText("▶" if self.is_paused else "⏸")
         if self.is_paused: 
             self.timer.stop()
-            self.is_skipping = False
+            self.stop_skipping()
             self.show_feedback("Paused")
         else: 
-            self.timer.start(self.slideshow_interval)
+            self.timer.start(self.slide_interval())
             self.show_feedback("Resumed")
+        self.update_animation_state()
 
     def toggle_info_pane(self):
         if self.info_pane_widget.isVisible():
@@ -679,9 +3586,42 @@ class SlideshowWidget(QWidget):
         else:
             self.info_pane_widget.show()
             self.info_panel_visible = True
+            if self.image_files: self.load_png_info(self.image_files[self.current_index])
             self.info_search_bar.setFocus()
         self.save_settings()
 
+    def toggle_thumbnail_view(self):
+        self.thumbnails_visible = not self.thumbnail_view.isVisible()
+        self.thumbnail_view.setVisible(self.thumbnails_visible)
+        self.sync_thumbnail_selection()
+        self.save_settings()
+
+    def toggle_timing_hud(self):
+        self.set_timing_hud_visible(not self.timing_hud_visible)
+        self.save_settings()
+
+    def set_timing_hud_visible(self, visible):
+        self.timing_hud_visible = visible
+        self.timing_hud.setVisible(visible)
+        if visible:
+            self.update_timing_hud()
+            self.timing_hud_timer.start()
+        else:
+            self.timing_hud_timer.stop()
+
+    def update_timing_hud(self):
+        self.timing_hud.setText(self.stage_timings.summary())
+        self.timing_hud.adjustSize()
+        self.timing_hud.move(10, self.title_bar.height() + 10)
+        self.timing_hud.raise_()
+
+    def export_timing_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Timing Trace", "slidescovery_trace.json", "Chrome Trace (*.json);;JSON Lines (*.jsonl)")
+        if not path: return
+        try: count = self.stage_timings.export(path)
+        except OSError as e: self.show_feedback(f"Export failed: {e}"); return
+        self.show_feedback(f"Exported {count} timing events")
+
     def toggle_tree_view(self):
         if self.tree_view.isVisible():
             self.tree_view.hide()
@@ -691,10 +3631,40 @@ class SlideshowWidget(QWidget):
             self.tree_toggle_button.setText("<<")
 
     def update_image_display(self):
-        if self.current_pixmap and not self.current_pixmap.isNull():
-            scaled_pixmap = self.current_pixmap.scaled(self.image_label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        if not self.current_pixmap or self.current_pixmap.isNull(): return
+        with self.stage_timings.measure("scale"):
+            target_size = self.image_label.size()
+            scaled_key = self.current_image_key + ((target_size.width(), target_size.height()),) if self.current_image_key else None
+            scaled_pixmap = self.image_cache.get(scaled_key) if scaled_key else None
+            if scaled_pixmap is None:
+                scaled_pixmap = self.current_pixmap.scaled(target_size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+                if scaled_key: self.image_cache.put(scaled_key, scaled_pixmap)
             self.image_label.setPixmap(scaled_pixmap)
 
+    def closeEvent(self, event):
+        self.folder_scan_cancel_event.set()
+        self.index_cancel_event.set()
+        self.scan_cancel_event.set()
+        self.duplicate_scan_cancel_event.set()
+        self.stop_animation()
+        self.file_operations.wait_for_done()
+        self.save_startup_snapshot()
+        if self.walk_folder: self.save_settings() # Keep the random walk's position for the next start
+        self.metadata_store.flush() # Last: the snapshot reads the info of the images around the current one, which may queue writes
+        super().closeEvent(event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_animation_state()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.update_animation_state()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange: self.update_animation_state() # Minimized or restored
+
     def resizeEvent(self, event: QResizeEvent):
         super().resizeEvent(event)
         self.reposition_feedback()
@@ -722,6 +3692,8 @@ class SlideshowWidget(QWidget):
         else:
             self.showMaximized()
             self.title_bar.maximize_restore_button.setText("🗗")
+        # The decode resolution depends on the window state; redraw once the layout has settled
+        QTimer.singleShot(0, self.display_current_image)
 
     def keyPressEvent(self, event: QKeyEvent):
         if self.info_search_bar.hasFocus():
@@ -729,11 +3701,17 @@ class SlideshowWidget(QWidget):
             return
             
         if not self.image_files: return
+        if self.duplicate_clusters is not None:
+            review_map = {Qt.Key.Key_Right: lambda: self.step_duplicate(1), Qt.Key.Key_Left: lambda: self.step_duplicate(-1),
+                          Qt.Key.Key_K: self.keep_duplicate, Qt.Key.Key_S: self.skip_duplicate_cluster, Qt.Key.Key_Escape: self.end_duplicate_review}
+            action = review_map.get(event.key())
+            if action: action(); return
         key_map = {
             Qt.Key.Key_Right: lambda: self.show_next_image(manual=True), Qt.Key.Key_Left: self.show_previous_image, 
             Qt.Key.Key_Up: self.show_random_image, Qt.Key.Key_Down: self.show_random_image,
             Qt.Key.Key_1: self.add_to_favorites, Qt.Key.Key_2: self.add_to_likes, 
-            Qt.Key.Key_P: self.toggle_pause, Qt.Key.Key_I: self.toggle_info_pane,
+            Qt.Key.Key_P: self.toggle_pause, Qt.Key.Key_I: self.toggle_info_pane, Qt.Key.Key_T: self.toggle_thumbnail_view,
+            Qt.Key.Key_H: self.toggle_timing_hud,
             Qt.Key.Key_Delete: self.delete_current_image, Qt.Key.Key_Escape: self.close
         }
         action = key_map.get(event.key())
@@ -767,31 +3745,25 @@ class SlideshowWidget(QWidget):
     def dropEvent(self, event):
         for url in event.mimeData().urls():
             file_path = url.toLocalFile()
-            if os.path.isfile(file_path) and file_path.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif')):
+            if os.path.isfile(file_path) and file_path.lower().endswith(VALID_EXTENSIONS):
                 self.load_single_image(file_path)
                 event.acceptProposedAction()
                 return
         event.ignore()
 
     def load_single_image(self, image_path):
-        self.is_skipping = False
+        self.stop_skipping()
         folder_path = os.path.dirname(image_path)
         self.source_folder = folder_path
         self.save_settings()
         self._set_tree_view_root() # Call helper to set up tree view
-        self.load_images(folder_path)
-        self.apply_sorting()
-        
-        normalized_dropped_image_path = os.path.normpath(image_path)
-        try: self.current_index = self.image_files.index(normalized_dropped_image_path)
-        except ValueError: self.current_index = 0
-            
-        self.display_current_image()
+        self.load_images(folder_path, focus_path=image_path) # Shows the dropped image once the listing is complete
         self.timer.stop()
         self.is_paused = True
         self.pause_button.setText("▶")
 
     def _set_tree_view_root(self):
+        if not self.deferred_startup_done: return # run_deferred_startup calls back once the first image is up
         if self.source_folder and os.path.exists(self.source_folder):
             # Set the model's root to the parent of the source_folder
             # This allows the source_folder itself to be an item in the tree
@@ -799,16 +3771,37 @@ class SlideshowWidget(QWidget):
             if not parent_dir: # Handle case where source_folder is a drive root (e.g., C:\)
                 parent_dir = self.source_folder # If it's a drive root, treat it as its own parent for display purposes
 
-            self.file_system_model.setRootPath(parent_dir)
+            # Only the source folder is watched and gathered up front; the parent's other entries
+            # are fetched lazily as the view shows them, instead of populating every sibling folder
+            model = self.ensure_tree_model()
+            model.setRootPath(self.source_folder)
 
             # Set the tree view's visible root to the parent directory
-            self.tree_view.setRootIndex(self.file_system_model.index(parent_dir))
+            self.tree_view.setRootIndex(model.index(parent_dir))
 
             # Expand and select the source folder itself
-            source_index = self.file_system_model.index(self.source_folder)
+            source_index = model.index(self.source_folder)
             self.tree_view.expand(source_index)
             self.tree_view.setCurrentIndex(source_index)
 
+    def schedule_deferred_startup(self):
+        # Non-essential setup waits until the first image is up (or there is none to show)
+        if self.deferred_startup_scheduled: return
+        self.deferred_startup_scheduled = True
+        QTimer.singleShot(0, self.run_deferred_startup)
+
+    def run_deferred_startup(self):
+        self.deferred_startup_done = True
+        self._set_tree_view_root()
+        QThreadPool.globalInstance().start(ThumbnailCachePruneTask(self.thumbnail_model.cache_dir, THUMBNAIL_CACHE_BYTES))
+        self.mark_startup("deferred init")
+
+    def mark_startup(self, phase):
+        startup_profile.mark(phase)
+        if self.profile_startup and self.deferred_startup_done and not self.is_loading_folder:
+            self.profile_startup = False
+            print(startup_profile.report(), file=sys.stderr)
+
     def show_about_dialog(self):
         about_text = """
         Slidescovery
@@ -838,11 +3831,125 @@ class SlideshowWidget(QWidget):
         """
         QMessageBox.about(self, "About Slidescovery", about_text)
 
+# --- Headless command line ---
+
+def write_json_line(record):
+    sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def iter_png_info(paths, jobs):
+    # Yields (path, info) in the order of paths, reading metadata on all cores
+    if jobs <= 1:
+        yield from ((path, read_png_info(path)) for path in paths)
+        return
+    executor = ProcessPoolExecutor(max_workers=jobs)
+    try: yield from zip(paths, executor.map(read_png_info, paths, chunksize=64))
+    finally: executor.shutdown(cancel_futures=True) # Stopped early (e.g. the reader closed the pipe): skip the reads not started
+
+def load_cli_settings():
+    try:
+        with open(get_config_path(), 'r') as f: return json.load(f)
+    except (OSError, json.JSONDecodeError): return {}
+
+def cli_main(argv):
+    """
+    Runs the folder scan, sort, metadata extraction and term search without a window.
+
+    Results are streamed to stdout as JSON Lines, e.g.
+        python slidescovery.py search /outputs "1girl (smile OR laugh) -sketch" --recursive
+        python slidescovery.py export /outputs "1girl" --to favorites --mode hardlink
+    """
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('folder', help="Folder to scan")
+    common.add_argument('-r', '--recursive', action='store_true', help="Include subfolders")
+    common.add_argument('--sort', choices=SORT_ORDERS, default='alpha', help="Output order (default: alpha)")
+    common.add_argument('--desc', action='store_true', help="Descending order")
+    common.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help="Worker processes for metadata reads")
+    parser = argparse.ArgumentParser(prog="slidescovery.py", description="Headless Slidescovery. Results are written as JSON Lines.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    scan_parser = commands.add_parser('scan', parents=[common], help="List images with their file times and size")
+    scan_parser.add_argument('--metadata', action='store_true', help="Include the PNG text metadata")
+    search_parser = commands.add_parser('search', parents=[common], help="List images whose metadata matches a query")
+    search_parser.add_argument('query', help="Query in the info search bar syntax: space-separated terms must all match; OR (or |), "
+                               "NOT (or a leading -) and parentheses combine them. A term is a word, a \"quoted phrase\" or a /regex/, "
+                               "optionally scoped to a parameter, e.g. '1girl (smile OR laugh) -sketch model:sdxl seed:100..200'")
+    export_parser = commands.add_parser('export', parents=[common], help="Copy matching images into a folder")
+    export_parser.add_argument('query', help="Query in the info search bar syntax")
+    export_parser.add_argument('--to', required=True, help="'favorites', 'likes' (folders from the app settings) or a directory")
+    export_parser.add_argument('--mode', choices=TRANSFER_MODES, help="Transfer mode (default: the app setting for favorites/likes, else auto)")
+    args = parser.parse_args(argv)
+
+    query = None
+    if args.command != 'scan':
+        try: query = SearchQuery.parse(args.query)
+        except QuerySyntaxError as e:
+            print(f"slidescovery: invalid query: {e}", file=sys.stderr)
+            return 2
+        if query is None:
+            print("slidescovery: empty query", file=sys.stderr)
+            return 2
+    try: entries = dict(iter_image_files(args.folder, args.recursive))
+    except OSError as e:
+        print(f"slidescovery: cannot read {args.folder}: {e}", file=sys.stderr)
+        return 2
+    paths = list(entries)
+    needs_info = args.command != 'scan' or args.metadata
+    infos = {}
+    if args.sort in INFO_SORT_ORDERS:
+        infos = dict(iter_png_info(paths, args.jobs)) # The sort key needs every file's metadata up front
+    if args.sort == 'random': random.shuffle(paths)
+    else:
+        key = make_sort_key(args.sort, lambda path, record: info_sort_values(infos[path]))
+        paths.sort(key=lambda path: key(path, entries[path]), reverse=args.desc)
+
+    if not needs_info:
+        for path in paths:
+            created, modified, size = entries[path]
+            write_json_line({'path': path, 'created': created, 'modified': modified, 'size': size})
+        return 0
+    results = ((path, infos[path]) for path in paths) if infos else iter_png_info(paths, args.jobs)
+
+    if args.command == 'scan':
+        for path, info in results:
+            created, modified, size = entries[path]
+            write_json_line({'path': path, 'created': created, 'modified': modified, 'size': size, 'info': dict(info),
+                             'params': parse_generation_params(info)})
+        return 0
+
+    matches = ((path, info) for path, info in results if query.matches(format_png_info(info), parse_generation_params(info)))
+    if args.command == 'search':
+        for path, info in matches: write_json_line({'path': path, 'info': dict(info)})
+        return 0
+
+    settings = load_cli_settings()
+    dest_folder = settings.get(args.to) if args.to in ('favorites', 'likes') else args.to
+    if not dest_folder or not os.path.isdir(dest_folder):
+        print(f"slidescovery: destination folder not set or missing: {args.to}", file=sys.stderr)
+        return 2
+    mode = args.mode or (settings.get(f"{args.to}_transfer") if args.to in ('favorites', 'likes') else None) or 'auto'
+    for path, _ in matches:
+        try: write_json_line({'path': path, 'dest': dest_folder, 'strategy': transfer_file(path, dest_folder, mode)})
+        except Exception as e: write_json_line({'path': path, 'error': str(e)})
+    return 0
+
 if __name__ == '__main__':
+    if HEADLESS:
+        QCoreApplication(sys.argv) # No window; only so QStandardPaths resolves the same settings folder as the app
+        try:
+            status = cli_main(sys.argv[1:])
+            sys.stdout.flush()
+        except BrokenPipeError: # The reader stopped early, e.g. `| head`: not an error
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno()) # So the flush at interpreter exit doesn't fail again
+            status = 0
+        sys.exit(status)
+    profile_startup = '--profile-startup' in sys.argv
+    if profile_startup: sys.argv.remove('--profile-startup')
+    startup_profile.mark("imports")
     app = QApplication(sys.argv)
+    startup_profile.mark("QApplication")
     script_dir = os.path.dirname(os.path.abspath(__file__))
     icon_path = os.path.join(script_dir, "favicon.ico")
     app.setWindowIcon(QIcon(icon_path))
-    widget = SlideshowWidget()
+    widget = SlideshowWidget(profile_startup)
     widget.show()
+    startup_profile.mark("window shown")
     sys.exit(app.exec())
@@ -0,0 +1,18 @@
+import struct
+import zlib
+
+import pytest
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+@pytest.fixture
+def write_png():
+    # write_png(path, text): a 1x1 PNG with text as its 'parameters' chunk (None for no text chunk)
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+    def write(path, text):
+        chunks = [chunk(b'IHDR', struct.pack('>IIBBBBB', 1, 1, 8, 0, 0, 0, 0))]
+        if text is not None: chunks.append(chunk(b'tEXt', b'parameters\0' + text.encode('latin-1')))
+        chunks += [chunk(b'IDAT', zlib.compress(b'\0\0')), chunk(b'IEND', b'')]
+        with open(path, 'wb') as f: f.write(PNG_SIGNATURE + b''.join(chunks))
+    return write
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("PyQt6") # slidescovery imports Qt at module level
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import slidescovery
+
+MODELS = {'f0.png': 'zeta', 'f1.png': 'alpha', 'f2.png': 'beta'}
+
+@pytest.fixture
+def library(tmp_path, write_png):
+    # lib/src and its sibling lib/other, each holding f0..f2 with the models above
+    store = slidescovery.MetadataStore(str(tmp_path / 'metadata.db'))
+    for folder in ('src', 'other'):
+        os.makedirs(tmp_path / 'lib' / folder)
+        for name, model in MODELS.items():
+            write_png(str(tmp_path / 'lib' / folder / name), f"a picture\nSteps: 20, Seed: 1, Model: {model}")
+    for folder in ('src', 'other'):
+        for path, _ in slidescovery.iter_image_files(str(tmp_path / 'lib' / folder), False): store.get_info(path)
+    store.flush()
+    return store, tmp_path / 'lib'
+
+def sorted_names(store, folder):
+    # The listing of folder in model order, sorted the way SlideshowWidget.sort_key_function does
+    entries = list(slidescovery.iter_image_files(folder, False))
+    values = store.sort_values(folder)
+    def get_sort_values(path, record):
+        stored = values.get(path)
+        return stored[1:] if stored and stored[0] == record[1] else None
+    key = slidescovery.make_sort_key('model', get_sort_values)
+    return [os.path.basename(path) for path, record in sorted(entries, key=lambda entry: key(*entry))]
+
+@pytest.mark.parametrize('folder', ['src', 'other', os.path.join('.', 'src'), os.path.join('other', '')])
+def test_model_sort_of_any_listed_folder(library, folder):
+    store, lib = library
+    assert sorted_names(store, os.path.join(str(lib), folder)) == ['f1.png', 'f2.png', 'f0.png']
+
+def test_sort_values_stay_within_the_folder(library):
+    store, lib = library
+    assert {os.path.dirname(path) for path in store.sort_values(os.path.join(str(lib), '.', 'other'))} == {os.path.join(str(lib), 'other')}
+
+@pytest.mark.parametrize('folder', ['other', os.path.join('.', 'src')])
+def test_model_counts_over_the_listed_folder(library, folder):
+    store, lib = library
+    folder = os.path.join(str(lib), folder)
+    paths = [path for path, _ in slidescovery.iter_image_files(folder, False) if not path.endswith('f2.png')] # f2 is not listed
+    assert slidescovery.count_models(paths, store.sort_values(folder)) == [('alpha', 1), ('zeta', 1)]
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("PyQt6") # slidescovery imports Qt at module level
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import slidescovery
+
+FILES = {
+    'cat.png': "a cat sitting on a mat\nNegative prompt: blurry\nSteps: 20, Sampler: Euler, CFG scale: 7, Seed: 42, Size: 512x512, Model: sdxl",
+    'sketch.png': "a pencil sketch of a dog\nSteps: 30, Sampler: DPM++ 2M, CFG scale: 5.5, Seed: 18446744073709551615, Model: flux",
+    'abstract.png': "abstract shapes",
+    'plain.png': None, # A PNG without text chunks
+    'photo.jpg': None, # Not a PNG: no metadata at all
+}
+
+QUERIES = ['cat', 'sketch', '-sketch', 'NOT ab', 'ab', 'ca', '-ca', 'dog OR cat', '"pencil sketch"', '-"pencil sketch"',
+           'model:sdxl', '-model:sdxl', 'model:sd OR model:fl', 'seed:40..50', 'NOT seed:40..50', 'seed:18446744073709551615',
+           'steps:..25', 'cfg:5..6', '/sk.tch/', '-/sk.tch/', '/^abstract/', '(cat OR dog) -blurry', 'negative:blur', '-negative:blur']
+
+@pytest.fixture
+def indexed(tmp_path, write_png):
+    paths = []
+    for name, text in FILES.items():
+        path = str(tmp_path / name)
+        if name.endswith('.png'): write_png(path, text)
+        else:
+            with open(path, 'wb') as f: f.write(b'\xff\xd8\xff\xd9')
+        paths.append(path)
+    store = slidescovery.MetadataStore(str(tmp_path / 'metadata.db'))
+    if not store.fts_available: pytest.skip("SQLite without FTS5 trigram support")
+    for path in paths: store.get_info(path)
+    store.flush()
+    return store, paths
+
+@pytest.mark.parametrize('text', QUERIES)
+def test_sql_and_python_backends_agree(indexed, text):
+    store, paths = indexed
+    query = slidescovery.SearchQuery.parse(text)
+    evaluated = {path for path in paths if query.matches(slidescovery.format_png_info(store.get_info(path)), store.get_params(path))}
+    assert store.search(query, paths) & set(paths) == evaluated
+
+def test_negated_terms_match_files_without_metadata(indexed):
+    store, paths = indexed
+    photo = next(path for path in paths if path.endswith('.jpg'))
+    assert photo in store.search(slidescovery.SearchQuery.parse('-sketch'), paths)
+    assert photo not in store.search(slidescovery.SearchQuery.parse('sketch'), paths)